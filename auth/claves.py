@@ -0,0 +1,118 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+# =========================================================
+# BCRYPT EN UN POOL DE PROCESOS
+# =========================================================
+# Hashear / verificar tarda decenas de ms de CPU. Se hace en
+# procesos aparte para no frenar al resto de los endpoints.
+# Este módulo no importa nada de la app: los procesos hijos
+# (spawn) lo cargan solo a él.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+BCRYPT_PROCESOS = int(os.getenv("BCRYPT_PROCESOS", str(min(2, os.cpu_count() or 1))))
+
+# Más pedidos esperando que esto y se responde 503
+BCRYPT_COLA_MAX = int(os.getenv("BCRYPT_COLA_MAX", "64"))
+
+# Con min = max = BCRYPT_ROUNDS, needs_update() marca para rehash
+# cualquier hash con otro costo
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+
+def hashear(password: str) -> str:
+    return pwd_context.hash(password[:72])
+
+
+def verificar_y_actualizar(password: str, hashed: str) -> tuple[bool, str | None]:
+    """
+    (ok, hash_nuevo). hash_nuevo viene solo si la clave es
+    correcta y el hash guardado usa otro costo.
+    """
+    if not hashed:
+        return False, None
+    return pwd_context.verify_and_update(password[:72], hashed)
+
+
+# =========================================================
+# POOL (uno por worker, se crea al primer uso)
+# =========================================================
+class PoolClaves:
+
+    def __init__(self, procesos: int, cola_max: int):
+        self.procesos = procesos
+        self.cola_max = cola_max
+
+        self._pool = None
+        self._lock = threading.Lock()
+
+        self.pendientes = 0
+        self.completadas = 0
+        self.rechazadas = 0
+
+    def _ejecutor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.procesos,
+                    # spawn: sin heredar hilos ni conexiones del worker
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._pool
+
+    async def ejecutar(self, funcion, *args):
+        with self._lock:
+            if self.pendientes >= self.cola_max:
+                self.rechazadas += 1
+                raise HTTPException(
+                    status_code=503,
+                    detail="Servidor ocupado, probá de nuevo en unos segundos"
+                )
+            self.pendientes += 1
+
+        try:
+            futuro = self._ejecutor().submit(funcion, *args)
+            return await asyncio.wrap_future(futuro)
+
+        finally:
+            with self._lock:
+                self.pendientes -= 1
+                self.completadas += 1
+
+    def metricas(self) -> dict:
+        with self._lock:
+            return {
+                "procesos": self.procesos,
+                "pendientes": self.pendientes,
+                "completadas": self.completadas,
+                "rechazadas": self.rechazadas,
+                "cola_max": self.cola_max,
+            }
+
+    def cerrar(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+
+pool_claves = PoolClaves(BCRYPT_PROCESOS, BCRYPT_COLA_MAX)
+
+
+async def hashear_async(password: str) -> str:
+    return await pool_claves.ejecutar(hashear, password)
+
+
+async def verificar_async(password: str, hashed: str) -> tuple[bool, str | None]:
+    return await pool_claves.ejecutar(verificar_y_actualizar, password, hashed)
@@ -1,44 +1,48 @@
-from fastapi import Depends, HTTPException, Header
+from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt
 from sqlalchemy.orm import Session
 
-from auth.security import SECRET_KEY, ALGORITHM, decode_token
+from auth.sesiones import Claims, UsuarioActual, obtener_usuario, verificar_token
 from database import get_db
-from models import RolEnum, Usuario
+from models import RolEnum
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
 
-# 🔐 Obtener usuario actual
+# 🔐 Claims firmados del token (sin base de datos)
+def get_claims(token: str = Depends(oauth2_scheme)) -> Claims:
+    return verificar_token(token)
+
+
+# 🔐 Obtener usuario actual (cacheado, ver auth/sesiones.py)
 def get_current_user(
-    token: str = Depends(oauth2_scheme),
+    claims: Claims = Depends(get_claims),
     db: Session = Depends(get_db)
-):
-    print("=== ENTRE A GET_CURRENT_USER ===")
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id = payload.get("user_id")  # ✅ CORRECTO
+) -> UsuarioActual:
+    user = obtener_usuario(db, claims.user_id)
 
-        if not user_id:
-            raise HTTPException(status_code=401, detail="Token inválido")
+    if not user:
+        raise HTTPException(status_code=401, detail="Usuario no encontrado")
 
-        user = db.query(Usuario).filter_by(id=int(user_id)).first()
-
-        if not user:
-            raise HTTPException(status_code=401, detail="Usuario no encontrado")
+    return user
 
-        return user
 
-    except:
-        raise HTTPException(status_code=401, detail="Credenciales inválidas")
+# 🙋 Cliente
+def cliente_required(
+    user: UsuarioActual = Depends(get_current_user)
+):
+    if user.rol != RolEnum.cliente:
+        raise HTTPException(
+            status_code=403,
+            detail="Solo los clientes pueden reservar turnos"
+        )
+    return user
 
 
 # 👑 Admin
 def admin_required(
-    user: Usuario = Depends(get_current_user)
+    user: UsuarioActual = Depends(get_current_user)
 ):
-    print("🔥 ADMIN_REQUIRED")
     if user.rol != RolEnum.admin:
         raise HTTPException(status_code=403, detail="No autorizado")
     return user
@@ -46,14 +50,14 @@ def admin_required(
 
 # 💈 Barbero
 def barbero_required(
-    user: Usuario = Depends(get_current_user)
+    user: UsuarioActual = Depends(get_current_user)
 ):
     if user.rol not in [RolEnum.admin, RolEnum.barbero]:
         raise HTTPException(status_code=403, detail="No autorizado")
     return user
 
 def empleado_required(
-    user: Usuario = Depends(get_current_user)
+    user: UsuarioActual = Depends(get_current_user)
 ):
     if user.rol not in [RolEnum.admin, RolEnum.barbero]:
         raise HTTPException(
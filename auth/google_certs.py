@@ -0,0 +1,101 @@
+import os
+import re
+import threading
+import time
+
+import requests
+from google.auth import exceptions, jwt
+
+# =========================================================
+# CERTIFICADOS DE GOOGLE (cacheados según Cache-Control)
+# =========================================================
+# verify_oauth2_token baja los certificados en cada login. Acá se
+# bajan con una sesión HTTP compartida y se reusan hasta que vence
+# el max-age que manda Google (suelen ser varias horas).
+GOOGLE_CERTS_URL = os.getenv(
+    "GOOGLE_CERTS_URL",
+    "https://www.googleapis.com/oauth2/v1/certs",
+)
+
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+
+# Sin Cache-Control usable
+TTL_POR_DEFECTO = 3600
+
+# Un token con kid desconocido fuerza a recargar, pero no más
+# seguido que esto (rotación de claves, no abuso)
+REFRESCO_MINIMO_SEG = 30
+
+
+def _max_age(headers) -> int:
+    cache_control = headers.get("Cache-Control", "")
+
+    if "no-store" in cache_control or "no-cache" in cache_control:
+        return 0
+
+    encontrado = re.search(r"max-age=(\d+)", cache_control)
+    if not encontrado:
+        return TTL_POR_DEFECTO
+
+    edad = int(headers.get("Age", "0") or 0)
+    return max(0, int(encontrado.group(1)) - edad)
+
+
+class CacheCertificados:
+
+    def __init__(self, url: str):
+        self.url = url
+        self.sesion = requests.Session()
+
+        self._certs = None
+        self._vence = 0.0
+        self._ultima_descarga = 0.0
+        self._lock = threading.Lock()
+
+        self.descargas = 0
+
+    def _descargar(self):
+        respuesta = self.sesion.get(self.url, timeout=10)
+        respuesta.raise_for_status()
+
+        ahora = time.monotonic()
+        self._certs = respuesta.json()
+        self._vence = ahora + _max_age(respuesta.headers)
+        self._ultima_descarga = ahora
+        self.descargas += 1
+
+    def obtener(self, forzar: bool = False) -> dict:
+        with self._lock:
+            ahora = time.monotonic()
+
+            if forzar and ahora - self._ultima_descarga < REFRESCO_MINIMO_SEG:
+                forzar = False
+
+            if forzar or self._certs is None or ahora >= self._vence:
+                self._descargar()
+
+            return self._certs
+
+
+cache_certificados = CacheCertificados(GOOGLE_CERTS_URL)
+
+
+def verificar_id_token(token: str, audience: str | None) -> dict:
+    """
+    Igual que id_token.verify_oauth2_token pero con los
+    certificados cacheados.
+    """
+    try:
+        idinfo = jwt.decode(token, certs=cache_certificados.obtener(), audience=audience)
+    except ValueError as e:
+        # Google rotó las claves antes de que venciera el cache
+        if "Certificate for key id" not in str(e):
+            raise
+        idinfo = jwt.decode(token, certs=cache_certificados.obtener(forzar=True), audience=audience)
+
+    if idinfo["iss"] not in GOOGLE_ISSUERS:
+        raise exceptions.GoogleAuthError(
+            f"Wrong issuer. 'iss' should be one of the following: {GOOGLE_ISSUERS}"
+        )
+
+    return idinfo
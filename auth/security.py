@@ -1,31 +1,32 @@
+import logging
 from datetime import datetime, timedelta
 from jose import jwt, JWTError
-from passlib.context import CryptContext
 from fastapi import HTTPException
 import os
 
+logger = logging.getLogger(__name__)
+
 SECRET_KEY = os.getenv("SECRET_KEY")
-print("SECRET_KEY usada:", SECRET_KEY)
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 90
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Versiones sincrónicas (scripts). Los endpoints usan el pool de auth/claves.py
+from auth.claves import hashear, pwd_context, verificar_y_actualizar
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password[:72])
+    return hashear(password)
 
 def verify_password(password: str, hashed: str) -> bool:
-    return pwd_context.verify(password[:72], hashed)
+    return verificar_y_actualizar(password, hashed)[0]
 
 def create_token(data: dict):
-    print("CREANDO TOKEN con key:", SECRET_KEY)
+    logger.debug("🔑 Token creado", extra={"user_id": data.get("user_id")})
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 def decode_token(token: str):
-    print("DECODIFICANDO TOKEN con key:", SECRET_KEY)
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
 
@@ -36,7 +37,9 @@ def decode_token(token: str):
         payload["user_id"] = int(sub)  # 👈 normalizamos
         return payload
 
-    except JWTError:
+    except JWTError as e:
+        # Muy frecuente con tokens viejos: se muestrea
+        logger.info("🔒 Token rechazado: %s", e, extra={"muestreo": 0.1})
         raise HTTPException(
             status_code=401,
             detail="Por favor reinicie sesión por actualización de la pagina",
@@ -0,0 +1,152 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+from sqlalchemy.orm import Session
+
+from auth.security import decode_token
+from models import RolEnum, Usuario
+from services import eventos
+
+# =========================================================
+# CACHE DE TOKENS Y USUARIOS (por worker)
+# =========================================================
+# Un token ya verificado no se vuelve a decodificar y el usuario
+# se lee de la base una vez cada USUARIOS_CACHE_TTL segundos.
+# Un cambio en el usuario (rol, teléfono) se avisa con
+# registrar_cambio_usuario() por el bus de eventos (LISTEN/NOTIFY)
+# y cada worker lo saca de su cache al recibirlo.
+TOKENS_CACHE_TTL = int(os.getenv("TOKENS_CACHE_TTL", "300"))
+USUARIOS_CACHE_TTL = int(os.getenv("USUARIOS_CACHE_TTL", "60"))
+SESIONES_CACHE_MAX = int(os.getenv("SESIONES_CACHE_MAX", "10000"))
+
+
+class Claims(NamedTuple):
+    user_id: int
+    rol: str | None
+
+
+class UsuarioActual(NamedTuple):
+    """
+    Copia de solo lectura de la fila de `usuarios`
+    (lo que usan los endpoints del usuario logueado).
+    """
+    id: int
+    nombre: str
+    email: str
+    telefono: str | None
+    rol: RolEnum
+
+
+class CacheTTL:
+
+    def __init__(self, max_entradas: int):
+        self.max_entradas = max_entradas
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def obtener(self, clave):
+        ahora = time.monotonic()
+
+        with self._lock:
+            entrada = self._datos.get(clave)
+
+            if entrada is None or entrada[0] <= ahora:
+                if entrada is not None:
+                    del self._datos[clave]
+                self.misses += 1
+                return None
+
+            self._datos.move_to_end(clave)
+            self.hits += 1
+            return entrada[1]
+
+    def guardar(self, clave, valor, ttl: float):
+        with self._lock:
+            self._datos[clave] = (time.monotonic() + ttl, valor)
+            self._datos.move_to_end(clave)
+
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+
+    def invalidar(self, clave):
+        with self._lock:
+            self._datos.pop(clave, None)
+
+    def metricas(self) -> dict:
+        with self._lock:
+            return {
+                "entradas": len(self._datos),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+cache_tokens = CacheTTL(SESIONES_CACHE_MAX)
+cache_usuarios = CacheTTL(SESIONES_CACHE_MAX)
+
+
+def verificar_token(token: str) -> Claims:
+    claims = cache_tokens.obtener(token)
+    if claims is not None:
+        return claims
+
+    # decode_token valida firma y vencimiento (401 si falla)
+    payload = decode_token(token)
+    claims = Claims(user_id=payload["user_id"], rol=payload.get("rol"))
+
+    # Nunca más allá del vencimiento del token
+    restante = payload.get("exp", 0) - time.time()
+    ttl = min(TOKENS_CACHE_TTL, restante)
+    if ttl > 0:
+        cache_tokens.guardar(token, claims, ttl)
+
+    return claims
+
+
+def obtener_usuario(db: Session, user_id: int) -> UsuarioActual | None:
+    usuario = cache_usuarios.obtener(user_id)
+    if usuario is not None:
+        return usuario
+
+    fila = db.query(
+        Usuario.id, Usuario.nombre, Usuario.email,
+        Usuario.telefono, Usuario.rol,
+    ).filter(Usuario.id == user_id).first()
+
+    if fila is None:
+        return None
+
+    usuario = UsuarioActual(*fila)
+    cache_usuarios.guardar(user_id, usuario, USUARIOS_CACHE_TTL)
+    return usuario
+
+
+def invalidar_usuario(user_id: int):
+    """
+    Solo en este worker (para el request que hizo el cambio).
+    """
+    cache_usuarios.invalidar(user_id)
+
+
+def registrar_cambio_usuario(db: Session, user_id: int):
+    """
+    Llamar antes del commit: cuando se confirma, todos los workers
+    dejan de usar la copia cacheada del usuario.
+    """
+    eventos.emitir(db, {"tipo": "usuario-modificado", "user_id": user_id})
+
+
+eventos.al_recibir("usuario-modificado", lambda evento: invalidar_usuario(evento["user_id"]))
+
+
+def metricas() -> dict:
+    return {
+        "tokens": cache_tokens.metricas(),
+        "usuarios": cache_usuarios.metricas(),
+    }
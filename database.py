@@ -1,12 +1,18 @@
+import logging
 import os
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
 
+logger = logging.getLogger(__name__)
+
 DATABASE_URL = os.getenv("DATABASE_URL")
-print("🔹 Database URL:", DATABASE_URL)
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL no está configurada")
 
+# Sin la contraseña
+logger.info("🔹 Database URL: %s", make_url(DATABASE_URL).render_as_string(hide_password=True))
+
 engine = create_engine(
     DATABASE_URL,
     pool_pre_ping=True
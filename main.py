@@ -2,11 +2,17 @@ from fastapi import FastAPI
 from fastapi.openapi.utils import get_openapi
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
+import logging
 from routers.farixio import contact
 import os
 
 load_dotenv()
-print(os.getenv("ADMIN_EMAIL"))
+
+# Logs antes que nada: los módulos de abajo loguean al importarse
+from utils.logs import configurar_logs, detener_logs
+configurar_logs()
+logger = logging.getLogger("main")
+
 from database import engine
 from models import Base
 
@@ -21,18 +27,42 @@ app = FastAPI(title="Barbería API")
 RESET_DB = False  # ⚠️ poner False en producción
 
 if RESET_DB:
-    print("⚠️ Borrando tablas...")
+    logger.warning("⚠️ Borrando tablas...")
     Base.metadata.drop_all(bind=engine)
-    print("✅ Tablas eliminadas")
+    logger.warning("✅ Tablas eliminadas")
 
-print("📦 Creando tablas...")
 Base.metadata.create_all(bind=engine)
-print("✅ Tablas creadas")
-from services.agenda_service import generar_agenda_si_vacia
+logger.info("✅ Tablas creadas/validadas")
+from auth.claves import pool_claves
+from services.agenda_service import extender_agenda, generar_agenda_si_vacia
+from services.correo import despachar_pendientes
+from services.eventos import iniciar_escucha
+from services.idempotencia import purgar_vencidas
+from services.recordatorios import enviar_recordatorios
+from services.reservas import barrer_retenciones
+from services.resumen_diario import reconstruir_si_vacio
+from services.tareas import detener_tareas, iniciar_tarea_periodica
+
+AGENDA_INTERVALO_MIN = int(os.getenv("AGENDA_INTERVALO_MIN", "60"))
+EMAIL_INTERVALO_SEG = int(os.getenv("EMAIL_INTERVALO_SEG", "5"))
+RECORDATORIOS_INTERVALO_MIN = int(os.getenv("RECORDATORIOS_INTERVALO_MIN", "5"))
 
 @app.on_event("startup")
 def startup_event():
     generar_agenda_si_vacia()
+    reconstruir_si_vacio()
+    iniciar_escucha()
+    iniciar_tarea_periodica("extender-agenda", AGENDA_INTERVALO_MIN * 60, extender_agenda)
+    iniciar_tarea_periodica("purgar-idempotencia", 15 * 60, purgar_vencidas)
+    iniciar_tarea_periodica("barrer-retenciones", 30, barrer_retenciones)
+    iniciar_tarea_periodica("enviar-emails", EMAIL_INTERVALO_SEG, despachar_pendientes)
+    iniciar_tarea_periodica("recordatorios", RECORDATORIOS_INTERVALO_MIN * 60, enviar_recordatorios)
+
+@app.on_event("shutdown")
+def shutdown_event():
+    detener_tareas()
+    pool_claves.cerrar()
+    detener_logs()
 
 # =====================
 # OPENAPI / JWT
@@ -79,8 +109,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Idempotent-Replayed"],
 )
-print("🚀 INCLUYENDO ROUTER ADMIN")
 # =====================
 # ROUTERS
 # =====================
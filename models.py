@@ -1,5 +1,5 @@
 from sqlalchemy import (
-    Column, Integer, String, Boolean, Date, Time, ForeignKey, UniqueConstraint, Index, Float, Enum, text
+    Column, Integer, String, Boolean, Date, DateTime, Time, ForeignKey, UniqueConstraint, Index, Float, Enum, JSON, func, text
 )
 import enum
 from sqlalchemy.orm import relationship, declarative_base
@@ -83,20 +83,135 @@ class Horario(Base):
 
     barbero_id = Column(Integer, ForeignKey("usuarios.id"), nullable=False)
 
+    # Ocupado como continuación de un turno largo (servicio de varios horarios)
+    turno_extra_id = Column(
+        Integer,
+        ForeignKey("turnos.id", ondelete="SET NULL", use_alter=True, name="fk_horario_turno_extra"),
+        nullable=True,
+        index=True,
+    )
+
+    # Retención temporal mientras el cliente completa la reserva
+    # (disponible = False hasta hold_hasta)
+    hold_hasta = Column(DateTime(timezone=True), nullable=True)
+    hold_usuario_id = Column(Integer, ForeignKey("usuarios.id", ondelete="SET NULL"), nullable=True)
+
     turno = relationship(
         "Turno",
         back_populates="horario",
         uselist=False,
         cascade="all, delete-orphan",
+        foreign_keys="Turno.horario_id",
     )
 
-    barbero = relationship("Usuario")
+    barbero = relationship("Usuario", foreign_keys=[barbero_id])
 
     __table_args__ = (
         UniqueConstraint("fecha", "hora", "barbero_id", name="uq_fecha_hora_barbero"),
         Index("ix_fecha_disponible", "fecha", "disponible"),
+        Index("ix_horario_barbero_fecha_hora", "barbero_id", "fecha", "hora"),
+        # Búsqueda del próximo libre: index-only scan sobre los disponibles
+        Index(
+            "ix_horario_libre_fecha_hora",
+            "fecha", "hora", "barbero_id", "id",
+            postgresql_where=text("disponible"),
+        ),
+        # Barrido de retenciones vencidas: solo las filas retenidas
+        Index(
+            "ix_horario_hold_hasta",
+            "hold_hasta",
+            postgresql_where=text("hold_hasta IS NOT NULL"),
+        ),
+    )
+
+# ======================
+# EXCEPCIONES DE AGENDA (bloqueos en modo agenda virtual)
+# ======================
+class ExcepcionAgenda(Base):
+    __tablename__ = "excepciones_agenda"
+
+    id = Column(Integer, primary_key=True)
+    barbero_id = Column(Integer, ForeignKey("usuarios.id", ondelete="CASCADE"), nullable=False)
+    fecha = Column(Date, nullable=False)
+
+    # Sin horas = todo el día bloqueado. Rango inclusivo.
+    hora_desde = Column(Time, nullable=True)
+    hora_hasta = Column(Time, nullable=True)
+
+    motivo = Column(String(200), nullable=True)
+
+    barbero = relationship("Usuario")
+
+    __table_args__ = (
+        Index("ix_excepcion_barbero_fecha", "barbero_id", "fecha"),
+    )
+
+    def __repr__(self):
+        return f"<ExcepcionAgenda {self.barbero_id} {self.fecha} {self.hora_desde}-{self.hora_hasta}>"
+
+# ======================
+# VERSION DE DISPONIBILIDAD (ETag)
+# ======================
+class VersionDisponibilidad(Base):
+    __tablename__ = "versiones_disponibilidad"
+
+    clave = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<VersionDisponibilidad {self.clave} v{self.version}>"
+
+# ======================
+# IDEMPOTENCIA (respuestas guardadas por Idempotency-Key)
+# ======================
+class RespuestaIdempotente(Base):
+    __tablename__ = "respuestas_idempotentes"
+
+    # sha256 de token + Idempotency-Key + método + ruta
+    clave = Column(String(64), primary_key=True)
+
+    # NULL mientras la transacción original no terminó
+    status_code = Column(Integer, nullable=True)
+    cuerpo = Column(JSON, nullable=True)
+
+    expira = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<RespuestaIdempotente {self.clave[:8]} {self.status_code}>"
+
+# ======================
+# OUTBOX DE EMAILS (se escribe en la misma transacción del cambio)
+# ======================
+class EmailPendiente(Base):
+    __tablename__ = "emails_pendientes"
+
+    id = Column(Integer, primary_key=True)
+
+    destino = Column(String(150), nullable=False)
+    asunto = Column(String(200), nullable=False)
+    html = Column(String, nullable=False)
+
+    intentos = Column(Integer, nullable=False, default=0)
+    proximo_intento = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    ultimo_error = Column(String(500), nullable=True)
+
+    # NULL = todavía no salió
+    enviado_en = Column(DateTime(timezone=True), nullable=True)
+
+    creado = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        # El worker solo mira los pendientes
+        Index(
+            "ix_email_pendiente_proximo",
+            "proximo_intento",
+            postgresql_where=text("enviado_en IS NULL"),
+        ),
     )
 
+    def __repr__(self):
+        return f"<EmailPendiente {self.id} {self.destino} intentos={self.intentos}>"
+
 # ======================
 # SERVICIOS
 # ======================
@@ -108,6 +223,9 @@ class Servicio(Base):
     precio = Column(Float, nullable=False)
     activo = Column(Boolean, nullable=False, default=True)
 
+    # Minutos. Sin duración = ocupa un solo horario
+    duracion = Column(Integer, nullable=True)
+
     turnos = relationship(
         "Turno",
         back_populates="servicio",
@@ -137,15 +255,85 @@ class Turno(Base):
     hora = Column(Time, nullable=True)
     es_manual = Column(Boolean, nullable=False, default=False)
 
+    # Recordatorios ya encolados: 0 ninguno, 1 el del día antes, 2 el de la hora antes
+    recordatorio_enviado = Column(Integer, nullable=False, default=0, server_default=text("0"))
+
    
 
-    horario = relationship("Horario", back_populates="turno")
+    horario = relationship("Horario", back_populates="turno", foreign_keys=[horario_id])
     usuario = relationship("Usuario", back_populates="turnos", foreign_keys=[usuario_id])
     barbero = relationship("Usuario", back_populates="turnos_barbero", foreign_keys=[barbero_id])
     servicio = relationship("Servicio", back_populates="turnos")
 
+    __table_args__ = (
+        # Exportaciones: rango de fechas ya ordenado por (fecha, hora, id)
+        Index("ix_turno_fecha_hora_id", "fecha", "hora", "id"),
+        # Listado del admin: keyset con fecha / hora NULL al principio
+        # (mismas expresiones que TURNO_*_ORDEN en routers/admin.py)
+        Index(
+            "ix_turno_orden_listado",
+            text("coalesce(fecha, '0001-01-01'::date)"),
+            text("coalesce(hora, '00:00:00'::time)"),
+            "id",
+        ),
+        # Estadísticas por rango de fechas: index-only scan de las sumas
+        Index(
+            "ix_turno_fecha_cubre",
+            "fecha",
+            postgresql_include=["precio", "servicio_id", "barbero_id"],
+        ),
+        # Panel de un barbero (día / mes)
+        Index(
+            "ix_turno_barbero_fecha",
+            "barbero_id", "fecha",
+            postgresql_include=["precio"],
+        ),
+        # Recordatorios: rango por (fecha, hora) solo sobre los pendientes
+        Index(
+            "ix_turno_recordatorio_pendiente",
+            "fecha", "hora",
+            postgresql_where=text("recordatorio_enviado < 2"),
+        ),
+    )
+
     def __repr__(self):
         return f"<Turno {self.id} horario={self.horario_id} usuario={self.usuario_id} barbero={self.barbero_id}>"
+
+
+class ResumenDiario(Base):
+    """
+    Totales por (fecha, barbero, servicio), mantenidos en la misma
+    transacción que cada alta / baja / cambio de turno
+    (services/resumen_diario.py).
+    """
+    __tablename__ = "resumen_diario"
+
+    id = Column(Integer, primary_key=True)
+
+    fecha = Column(Date, nullable=False)
+    # Sin FK: el resumen no se toca si se borra un usuario
+    barbero_id = Column(Integer, nullable=True)
+    # Un servicio solo se puede borrar sin turnos: sus filas ya están en cero
+    servicio_id = Column(Integer, ForeignKey("servicios.id", ondelete="CASCADE"), nullable=False)
+
+    cantidad = Column(Integer, nullable=False, default=0)
+    facturacion = Column(Float, nullable=False, default=0)
+
+    admin_propia = Column(Float, nullable=False, default=0)
+    admin_alquiler = Column(Float, nullable=False, default=0)
+    parte_barbero = Column(Float, nullable=False, default=0)
+
+    __table_args__ = (
+        # Turnos sin barbero van en la fila con barbero_id NULL
+        Index(
+            "ux_resumen_diario_clave",
+            "fecha", text("coalesce(barbero_id, 0)"), "servicio_id",
+            unique=True,
+        ),
+    )
+
+    def __repr__(self):
+        return f"<ResumenDiario {self.fecha} barbero={self.barbero_id} servicio={self.servicio_id} x{self.cantidad}>"
     
 class RegistroManual(Base):
     __tablename__ = "registros_manuales"
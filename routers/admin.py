@@ -1,20 +1,35 @@
-print("🔥🔥🔥 CARGUE EL ADMIN.PY CORRECTO 🔥🔥🔥")
-
+import logging
 from sqlite3 import IntegrityError
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, aliased
 from database import SesionLocal
-from models import RolEnum, Turno, Horario, Servicio
+from models import ExcepcionAgenda, ResumenDiario, RolEnum, Turno, Horario, Servicio, Usuario
+from auth import sesiones
+from auth.claves import pool_claves
 from auth.deps import admin_required, barbero_required
 from routers.calendario import ZONA, RegistroManualRequest
-from utils.email import enviar_email_cancelacion
-from utils.email import enviar_email_edicion
-from datetime import date, timedelta, datetime
+from utils.email import encolar_email_cancelacion, encolar_email_edicion
+from datetime import date, time, timedelta, datetime
 from sqlalchemy import func
-from schemas import EditarTurno
+from schemas import EditarTurno, ExcepcionCreate
+from services import agenda_virtual, eventos, idempotencia
+from services.cache_disponibilidad import cache_calendario
+from services.ganancias import reparto
+from services.disponibilidad import registrar_cambio_agenda, registrar_cambio_horario
+from services.reservas import (
+    asignar_extras,
+    horarios_del_bloque,
+    liberar_extras,
+    reclamar_horarios,
+)
+from utils.paginacion import despues_de, paginar, paginar_lista, siguiente_cursor
+from utils.streaming import csv_en_tandas, json_en_tandas, ndjson_en_tandas, sesion_de_lectura
 from database import get_db
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 
@@ -24,36 +39,102 @@ router = APIRouter()
 # =========================
 # VER TODOS LOS TURNOS
 # =========================
+# Turnos viejos pueden no tener fecha / hora: el keyset ordena por
+# estas claves (NULL = primero) para que también se puedan paginar.
+# Mismas expresiones que ix_turno_orden_listado.
+TURNO_FECHA_ORDEN = func.coalesce(Turno.fecha, date.min)
+TURNO_HORA_ORDEN = func.coalesce(Turno.hora, time.min)
+
+
 @router.get("/turnos")
 def ver_turnos(
-    db: Session = Depends(get_db),
+    desde: date | None = None,
+    hasta: date | None = None,
+    barbero_id: int | None = None,
+    es_manual: bool | None = None,
+    cursor: str | None = None,
+    limite: int | None = Query(None, ge=1, le=5000),
     user=Depends(admin_required)
 ):
-    turnos = (
-        db.query(Turno)
-        .options(
-            joinedload(Turno.servicio),
-            joinedload(Turno.barbero)
+    """
+    Rango [desde, hasta], keyset por (fecha, hora, id) con el
+    cursor en X-Next-Cursor. La lista se manda de a tandas desde
+    un cursor del servidor: no se arma entera en memoria.
+
+    El cursor del header y las filas salen de la misma foto de la
+    base, así la página siguiente arranca justo después de la
+    última fila enviada.
+    """
+    db = sesion_de_lectura()
+
+    try:
+        Barbero = aliased(Usuario)
+
+        query = (
+            db.query(
+                Turno.id,
+                Turno.nombre,
+                Turno.telefono,
+                Turno.fecha,
+                Turno.hora,
+                Servicio.nombre.label("servicio"),
+                Turno.precio,
+                Barbero.nombre.label("barbero"),
+                Turno.barbero_id,
+                Turno.es_manual,
+            )
+            .join(Servicio, Turno.servicio_id == Servicio.id)
+            .outerjoin(Barbero, Turno.barbero_id == Barbero.id)
         )
-        .order_by(Turno.fecha.asc(), Turno.hora.asc())
-        .all()
+
+        if desde:
+            query = query.filter(Turno.fecha >= desde)
+        if hasta:
+            query = query.filter(Turno.fecha <= hasta)
+        if barbero_id is not None:
+            query = query.filter(Turno.barbero_id == barbero_id)
+        if es_manual is not None:
+            query = query.filter(Turno.es_manual == es_manual)
+        if cursor:
+            query = query.filter(
+                despues_de(cursor, TURNO_FECHA_ORDEN, TURNO_HORA_ORDEN, Turno.id)
+            )
+
+        query = query.order_by(TURNO_FECHA_ORDEN, TURNO_HORA_ORDEN, Turno.id)
+
+        siguiente = siguiente_cursor(
+            query, limite, TURNO_FECHA_ORDEN, TURNO_HORA_ORDEN, Turno.id
+        )
+
+        if limite:
+            query = query.limit(limite)
+
+    except Exception:
+        db.close()
+        raise
+
+    headers = {"X-Next-Cursor": siguiente} if siguiente else None
+
+    return StreamingResponse(
+        json_en_tandas(query.statement, _turno_admin, db=db),
+        media_type="application/json",
+        headers=headers,
     )
 
-    return [
-        {
-            "id": t.id,
-            "nombre": t.nombre,
-            "telefono": t.telefono,
-            "fecha": t.fecha.isoformat() if t.fecha else None,
-            "hora": t.hora.strftime("%H:%M") if t.hora else None,
-            "servicio": t.servicio.nombre,
-            "precio": t.precio,
-            "barbero": t.barbero.nombre if t.barbero else None,
-            "barbero_id": t.barbero_id,
-            "es_manual": t.es_manual,
-        }
-        for t in turnos
-    ]
+
+def _turno_admin(t) -> dict:
+    return {
+        "id": t.id,
+        "nombre": t.nombre,
+        "telefono": t.telefono,
+        "fecha": t.fecha.isoformat() if t.fecha else None,
+        "hora": t.hora.strftime("%H:%M") if t.hora else None,
+        "servicio": t.servicio,
+        "precio": t.precio,
+        "barbero": t.barbero,
+        "barbero_id": t.barbero_id,
+        "es_manual": t.es_manual,
+    }
 
 
 # =========================
@@ -62,9 +143,20 @@ def ver_turnos(
 @router.delete("/cancelar/{turno_id}")
 def cancelar_turno(
     turno_id: int,
+    request: Request,
     db: Session = Depends(get_db),
-    user=Depends(admin_required)
+    user=Depends(admin_required),
+    authorization: str | None = Header(None),
+    idempotency_key: str | None = Header(None, alias="Idempotency-Key"),
 ):
+    # 🔁 Reintento con la misma Idempotency-Key
+    clave = None
+    if idempotency_key:
+        clave = idempotencia.calcular_clave(authorization, idempotency_key, request)
+        previa = idempotencia.reclamar(db, clave)
+        if previa:
+            return previa
+
     turno = db.query(Turno).filter_by(id=turno_id).first()
 
     if not turno:
@@ -82,31 +174,32 @@ def cancelar_turno(
     # 🔓 Liberar horario solo si existe
     if horario:
         horario.disponible = True
-
-    # 📧 EMAIL DE CANCELACIÓN
-    try:
-        if turno.usuario and turno.usuario.email:
-            enviar_email_cancelacion(
-                destino=turno.usuario.email,
-                nombre=nombre,
-                fecha=horario.fecha if horario else turno.fecha,
-                hora=horario.hora if horario else turno.hora,
-                servicio=servicio
-            )
-            print("📧 Email de cancelación enviado")
-        else:
-            print("⚠️ Turno sin email asociado")
-    except Exception as e:
-        print("❌ Error enviando email:", e)
+        registrar_cambio_horario(db, horario)
+
+    liberar_extras(db, turno)
+
+    # 📧 EMAIL DE CANCELACIÓN (outbox, misma transacción)
+    if turno.usuario and turno.usuario.email:
+        encolar_email_cancelacion(
+            db,
+            destino=turno.usuario.email,
+            nombre=nombre,
+            fecha=horario.fecha if horario else turno.fecha,
+            hora=horario.hora if horario else turno.hora,
+            servicio=servicio.nombre
+        )
 
     # 🗑️ Eliminar turno
     db.delete(turno)
-    db.commit()
 
-    return {
+    respuesta = {
         "ok": True,
         "mensaje": "Turno cancelado correctamente"
     }
+    idempotencia.guardar(db, clave, respuesta)
+    db.commit()
+
+    return respuesta
 
 # =========================
 # EDITAR TURNO (ADMIN)
@@ -132,12 +225,21 @@ def editar_turno(
     # ======================
     if data.horario_id is not None:
         nuevo_horario = db.query(Horario).filter_by(id=data.horario_id).first()
-        if not nuevo_horario or not nuevo_horario.disponible:
+        if not nuevo_horario:
             raise HTTPException(status_code=400, detail="Horario no disponible")
 
+        # UPDATE condicional: no pisar una reserva concurrente
+        if not reclamar_horarios(db, [nuevo_horario]):
+            db.rollback()
+            raise HTTPException(status_code=409, detail="El horario ya fue reservado")
+
         horario_actual.disponible = True
-        nuevo_horario.disponible = False
         turno.horario_id = nuevo_horario.id
+        turno.fecha = nuevo_horario.fecha
+        turno.hora = nuevo_horario.hora
+        turno.recordatorio_enviado = 0
+
+        registrar_cambio_horario(db, horario_actual)
     else:
         nuevo_horario = horario_actual
 
@@ -157,8 +259,25 @@ def editar_turno(
         turno.precio = servicio.precio
         servicio_nuevo = servicio.nombre
     else:
+        servicio = turno.servicio
         servicio_nuevo = servicio_anterior
 
+    # ======================
+    # DURACIÓN (horarios extra del servicio)
+    # ======================
+    if data.horario_id is not None or data.servicio_id is not None:
+        liberar_extras(db, turno)
+        bloque = horarios_del_bloque(db, nuevo_horario, servicio)
+
+        if not bloque or not reclamar_horarios(db, bloque[1:]):
+            db.rollback()
+            raise HTTPException(
+                status_code=400,
+                detail="No hay lugar para la duración del servicio"
+            )
+
+        asignar_extras(turno, bloque)
+
     # ======================
     # TELEFONO
     # ======================
@@ -171,25 +290,23 @@ def editar_turno(
     if data.precio is not None:
         turno.precio = data.precio
 
-    db.commit()
-
     # ======================
-    # EMAIL
+    # EMAIL (outbox, misma transacción)
     # ======================
-    try:
-        if turno.usuario and turno.usuario.email:
-            enviar_email_edicion(
-                destino=turno.usuario.email,
-                nombre=turno.nombre,
-                fecha_anterior=fecha_anterior,
-                hora_anterior=hora_anterior,
-                fecha_nueva=nuevo_horario.fecha,
-                hora_nueva=nuevo_horario.hora,
-                servicio_anterior=servicio_anterior,
-                servicio_nuevo=servicio_nuevo,
-            )
-    except Exception as e:
-        print("Email edición error:", e)
+    if turno.usuario and turno.usuario.email:
+        encolar_email_edicion(
+            db,
+            destino=turno.usuario.email,
+            nombre=turno.nombre,
+            fecha_anterior=fecha_anterior,
+            hora_anterior=hora_anterior,
+            fecha_nueva=nuevo_horario.fecha,
+            hora_nueva=nuevo_horario.hora,
+            servicio_anterior=servicio_anterior,
+            servicio_nuevo=servicio_nuevo,
+        )
+
+    db.commit()
 
     return {
         "ok": True,
@@ -203,19 +320,23 @@ def toggle_horario(
     db: Session = Depends(get_db),
     user=Depends(admin_required),
 ):
-    horario = db.query(Horario).filter_by(id=horario_id).first()
+    # 🔒 Lock de fila: no cruzarse con una reserva en curso
+    horario = db.query(Horario).filter_by(id=horario_id).with_for_update().first()
     if not horario:
         raise HTTPException(status_code=404, detail="Horario no encontrado")
 
     # ❌ No permitir bloquear si ya hay turno
     turno_existente = db.query(Turno).filter_by(horario_id=horario.id).first()
-    if turno_existente:
+    if turno_existente or horario.turno_extra_id:
         raise HTTPException(
             status_code=400,
             detail="No se puede bloquear un horario con turno asignado"
         )
 
     horario.disponible = not horario.disponible
+    horario.hold_hasta = None
+    horario.hold_usuario_id = None
+    registrar_cambio_horario(db, horario)
     db.commit()
 
     return {
@@ -225,19 +346,70 @@ def toggle_horario(
         "disponible": horario.disponible,
     }
 
+@router.get("/metricas")
+def metricas(user=Depends(admin_required)):
+    # ⚠️ Contadores del worker que atiende la request
+    return {
+        "cache_calendario": cache_calendario.metricas(),
+        "suscriptores_sse": eventos.bus.cantidad_suscriptores(),
+        "cache_sesiones": sesiones.metricas(),
+        "bcrypt": pool_claves.metricas(),
+    }
+
 @router.get("/calendario-admin/{barbero_id}")
 def calendario_admin(
     barbero_id: int,
+    response: Response,
+    desde: date | None = None,
+    hasta: date | None = None,
+    cursor: str | None = None,
+    limite: int | None = Query(None, ge=1, le=1000),
     db: Session = Depends(get_db),
     user=Depends(admin_required),
 ):
-    horarios = (
-        db.query(Horario)
-        .filter(Horario.barbero_id == barbero_id)
-        .order_by(Horario.fecha, Horario.hora)
-        .all()
+    if agenda_virtual.ACTIVA:
+        horarios, siguiente = paginar_lista(
+            agenda_virtual.slots(db, [barbero_id], desde or date.today(), hasta),
+            cursor,
+            limite,
+        )
+
+        if siguiente:
+            response.headers["X-Next-Cursor"] = siguiente
+
+        return [
+            {
+                "id": h.id,
+                "fecha": h.fecha.isoformat(),
+                "hora": h.hora.strftime("%H:%M"),
+                "disponible": h.disponible,
+                "barbero_id": h.barbero_id,
+            }
+            for h in horarios
+        ]
+
+    query = db.query(Horario).filter(Horario.barbero_id == barbero_id)
+
+    if desde:
+        query = query.filter(Horario.fecha >= desde)
+
+    if hasta:
+        query = query.filter(Horario.fecha <= hasta)
+
+    if cursor:
+        query = query.filter(
+            despues_de(cursor, Horario.fecha, Horario.hora, Horario.id)
+        )
+
+    horarios, siguiente = paginar(
+        query.order_by(Horario.fecha, Horario.hora, Horario.id),
+        limite,
+        Horario.fecha, Horario.hora, Horario.id,
     )
 
+    if siguiente:
+        response.headers["X-Next-Cursor"] = siguiente
+
     return [
         {
             "id": h.id,
@@ -249,6 +421,98 @@ def calendario_admin(
         for h in horarios
     ]
 
+# =========================
+# EXCEPCIONES DE AGENDA (AGENDA VIRTUAL)
+# =========================
+@router.post("/excepciones")
+def crear_excepcion(
+    data: ExcepcionCreate,
+    db: Session = Depends(get_db),
+    user=Depends(barbero_required),
+):
+    if not agenda_virtual.ACTIVA:
+        raise HTTPException(
+            status_code=400,
+            detail="Las excepciones solo aplican con agenda virtual"
+        )
+
+    # 💈 Un barbero solo bloquea su propia agenda
+    barbero_id = data.barbero_id or user.id
+    if user.rol != RolEnum.admin and barbero_id != user.id:
+        raise HTTPException(status_code=403, detail="No autorizado")
+
+    if data.hora_hasta and not data.hora_desde:
+        raise HTTPException(status_code=400, detail="Falta hora_desde")
+
+    agenda_virtual.validar_profesional(db, barbero_id)
+
+    excepcion = ExcepcionAgenda(
+        barbero_id=barbero_id,
+        fecha=data.fecha,
+        hora_desde=data.hora_desde,
+        hora_hasta=data.hora_hasta,
+        motivo=data.motivo,
+    )
+
+    db.add(excepcion)
+    registrar_cambio_agenda(db, barbero_id)
+    db.commit()
+    db.refresh(excepcion)
+
+    return {"ok": True, "id": excepcion.id}
+
+
+@router.get("/excepciones")
+def listar_excepciones(
+    barbero_id: int | None = None,
+    desde: date | None = None,
+    db: Session = Depends(get_db),
+    user=Depends(barbero_required),
+):
+    if user.rol != RolEnum.admin:
+        barbero_id = user.id
+
+    query = db.query(ExcepcionAgenda).filter(
+        ExcepcionAgenda.fecha >= (desde or date.today())
+    )
+
+    if barbero_id:
+        query = query.filter(ExcepcionAgenda.barbero_id == barbero_id)
+
+    return [
+        {
+            "id": e.id,
+            "barbero_id": e.barbero_id,
+            "fecha": e.fecha.isoformat(),
+            "hora_desde": e.hora_desde.strftime("%H:%M") if e.hora_desde else None,
+            "hora_hasta": e.hora_hasta.strftime("%H:%M") if e.hora_hasta else None,
+            "motivo": e.motivo,
+        }
+        for e in query.order_by(ExcepcionAgenda.fecha, ExcepcionAgenda.hora_desde)
+    ]
+
+
+@router.delete("/excepciones/{excepcion_id}")
+def borrar_excepcion(
+    excepcion_id: int,
+    db: Session = Depends(get_db),
+    user=Depends(barbero_required),
+):
+    excepcion = db.query(ExcepcionAgenda).filter_by(id=excepcion_id).first()
+
+    if not excepcion:
+        raise HTTPException(status_code=404, detail="Excepción no encontrada")
+
+    if user.rol != RolEnum.admin and excepcion.barbero_id != user.id:
+        raise HTTPException(status_code=403, detail="No autorizado")
+
+    registrar_cambio_agenda(db, excepcion.barbero_id)
+    db.delete(excepcion)
+    db.commit()
+
+    return {"ok": True}
+
+
 @router.post("/registros-manuales")
 def crear_registro_manual(
     data: RegistroManualRequest,
@@ -308,6 +572,30 @@ def crear_registro_manual(
         )
 
     
+# =========================
+# GANANCIAS (desde resumen_diario)
+# =========================
+def _rango_ganancias(tipo: str, fecha: str | None, mes: str | None):
+    """
+    [inicio, fin) del día o del mes pedido; None = sin filtro.
+    """
+    if tipo == "dia":
+        inicio = date.fromisoformat(fecha)
+        return inicio, inicio + timedelta(days=1)
+
+    if tipo == "mes":
+        y, m = map(int, mes.split("-"))
+        return _rango_mes(y, m)
+
+    return None
+
+
+def _rango_mes(anio: int, mes: int):
+    inicio = date(anio, mes, 1)
+    fin = date(anio + 1, 1, 1) if mes == 12 else date(anio, mes + 1, 1)
+    return inicio, fin
+
+
 @router.get("/ganancias")
 def ver_ganancias(
     tipo: str,
@@ -316,43 +604,27 @@ def ver_ganancias(
     db: Session = Depends(get_db),
     user=Depends(admin_required),
 ):
-    query = db.query(Turno)
-
-    if tipo == "dia":
-        dia = date.fromisoformat(fecha)
-
-        query = query.filter(Turno.fecha == dia)
-
-    elif tipo == "mes":
-        y, m = map(int, mes.split("-"))
+    query = db.query(
+        func.coalesce(func.sum(ResumenDiario.facturacion), 0).label("facturacion"),
+        func.coalesce(func.sum(ResumenDiario.admin_propia), 0).label("admin_propia"),
+        func.coalesce(func.sum(ResumenDiario.admin_alquiler), 0).label("admin_alquiler"),
+        func.coalesce(func.sum(ResumenDiario.parte_barbero), 0).label("barberos"),
+    )
 
+    rango = _rango_ganancias(tipo, fecha, mes)
+    if rango:
         query = query.filter(
-            func.extract("year", Turno.fecha) == y,
-            func.extract("month", Turno.fecha) == m,
+            ResumenDiario.fecha >= rango[0],
+            ResumenDiario.fecha < rango[1],
         )
 
-    turnos = query.all()
-
-    facturacion_total = 0
-    ganancia_admin_propia = 0
-    ganancia_admin_alquiler = 0
-    ganancia_barberos = 0
-
-    for t in turnos:
-
-        facturacion_total += t.precio
-
-        if t.barbero and t.barbero.rol == RolEnum.admin:
-            ganancia_admin_propia += t.precio
-        else:
-            ganancia_admin_alquiler += t.precio * 0.40
-            ganancia_barberos += t.precio * 0.60
+    totales = query.one()
 
     return {
-        "facturacion_total": round(facturacion_total, 2),
-        "ganancia_admin_propia": round(ganancia_admin_propia, 2),
-        "ganancia_admin_alquiler": round(ganancia_admin_alquiler, 2),
-        "ganancia_barberos": round(ganancia_barberos, 2),
+        "facturacion_total": round(totales.facturacion, 2),
+        "ganancia_admin_propia": round(totales.admin_propia, 2),
+        "ganancia_admin_alquiler": round(totales.admin_alquiler, 2),
+        "ganancia_barberos": round(totales.barberos, 2),
     }
 
 @router.get("/ganancias/grafico")
@@ -363,39 +635,25 @@ def ganancias_grafico(
     db: Session = Depends(get_db),
     user=Depends(admin_required),
 ):
-    if tipo == "dia":
-        dia = date.fromisoformat(fecha)
-
-        resultados = (
-            db.query(
-                Servicio.nombre.label("servicio"),
-                func.sum(Turno.precio).label("total")
-            )
-            .join(Turno.servicio)
-            .filter(Turno.fecha == dia)
-            .group_by(Servicio.nombre)
-            .all()
-        )
+    if tipo not in ("dia", "mes"):
+        return []
 
-    elif tipo == "mes":
-        y, m = map(int, mes.split("-"))
+    inicio, fin = _rango_ganancias(tipo, fecha, mes)
 
-        resultados = (
-            db.query(
-                Servicio.nombre.label("servicio"),
-                func.sum(Turno.precio).label("total")
-            )
-            .join(Turno.servicio)
-            .filter(
-                func.extract("year", Turno.fecha) == y,
-                func.extract("month", Turno.fecha) == m,
-            )
-            .group_by(Servicio.nombre)
-            .all()
+    resultados = (
+        db.query(
+            Servicio.nombre.label("servicio"),
+            func.sum(ResumenDiario.facturacion).label("total")
         )
-
-    else:
-        return []
+        .join(Servicio, ResumenDiario.servicio_id == Servicio.id)
+        .filter(
+            ResumenDiario.fecha >= inicio,
+            ResumenDiario.fecha < fin,
+        )
+        .group_by(Servicio.nombre)
+        .having(func.sum(ResumenDiario.cantidad) > 0)
+        .all()
+    )
 
     return [
         {"servicio": r.servicio, "total": float(r.total)}
@@ -413,9 +671,21 @@ def detalle_ganancias(
     inicio = base
     fin = base + timedelta(days=1)
 
+    # Reparto por fila en SQL: sin cargar el barbero de cada turno
+    Barbero = aliased(Usuario)
+    admin_propia, admin_alquiler, parte_barbero = reparto(Barbero.rol, Turno.precio)
+
     query = (
-        db.query(Turno)
-        .join(Turno.servicio)
+        db.query(
+            Turno.nombre,
+            Servicio.nombre.label("servicio"),
+            Turno.precio,
+            admin_propia,
+            admin_alquiler,
+            parte_barbero,
+        )
+        .join(Servicio, Turno.servicio_id == Servicio.id)
+        .outerjoin(Barbero, Turno.barbero_id == Barbero.id)
         .filter(
             Turno.fecha >= inicio,
             Turno.fecha < fin
@@ -425,31 +695,17 @@ def detalle_ganancias(
     if servicio:
         query = query.filter(Servicio.nombre == servicio)
 
-    resultados = query.all()
-
-    detalle = []
-
-    for t in resultados:
-
-        if t.barbero and t.barbero.rol == RolEnum.admin:
-            admin_propia = t.precio
-            admin_alquiler = 0
-            barbero = 0
-        else:
-            admin_propia = 0
-            admin_alquiler = t.precio * 0.40
-            barbero = t.precio * 0.60
-
-        detalle.append(
-            {
-                "nombre": t.nombre,
-                "servicio": t.servicio.nombre,
-                "precio": t.precio,
-                "admin_propia": round(admin_propia, 2),
-                "admin_alquiler": round(admin_alquiler, 2),
-                "barbero": round(barbero, 2),
-            }
-        )
+    detalle = [
+        {
+            "nombre": r.nombre,
+            "servicio": r.servicio,
+            "precio": r.precio,
+            "admin_propia": round(r.admin_propia, 2),
+            "admin_alquiler": round(r.admin_alquiler, 2),
+            "barbero": round(r.barbero, 2),
+        }
+        for r in query.all()
+    ]
 
     return detalle
 @router.get("/estadisticas/dia")
@@ -481,18 +737,21 @@ def resumen_mes(
     db: Session = Depends(get_db),
     user=Depends(admin_required),
 ):
+    inicio, fin = _rango_mes(anio, mes)
+
     resultados = (
         db.query(
-            Turno.fecha.label("fecha"),
-            func.count(Turno.id).label("clientes"),
-            func.coalesce(func.sum(Turno.precio), 0).label("total")
+            ResumenDiario.fecha.label("fecha"),
+            func.sum(ResumenDiario.cantidad).label("clientes"),
+            func.coalesce(func.sum(ResumenDiario.facturacion), 0).label("total")
         )
         .filter(
-            func.extract("year", Turno.fecha) == anio,
-            func.extract("month", Turno.fecha) == mes,
+            ResumenDiario.fecha >= inicio,
+            ResumenDiario.fecha < fin,
         )
-        .group_by(Turno.fecha)
-        .order_by(Turno.fecha)
+        .group_by(ResumenDiario.fecha)
+        .having(func.sum(ResumenDiario.cantidad) > 0)
+        .order_by(ResumenDiario.fecha)
         .all()
     )
 
@@ -516,3 +775,119 @@ def resumen_mes(
         "dias": dias
     }
 
+
+
+# =========================
+# EXPORTAR (CSV / NDJSON)
+# =========================
+# Rango [desde, hasta] de una sola vez: las filas salen de un
+# cursor del servidor de a tandas, la memoria no depende del rango.
+FORMATOS_EXPORTACION = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+COLUMNAS_EXPORTAR_TURNOS = [
+    "id", "fecha", "hora", "nombre", "telefono",
+    "servicio", "barbero", "barbero_id", "es_manual", "precio",
+]
+
+COLUMNAS_EXPORTAR_GANANCIAS = [
+    "id", "fecha", "hora", "nombre", "servicio", "barbero", "precio",
+    "admin_propia", "admin_alquiler", "parte_barbero",
+]
+
+
+def _consulta_exportacion(db: Session, desde: date, hasta: date, barbero_id: int | None):
+    if hasta < desde:
+        raise HTTPException(status_code=400, detail="Rango de fechas inválido")
+
+    Barbero = aliased(Usuario)
+    admin_propia, admin_alquiler, parte_barbero = reparto(Barbero.rol, Turno.precio)
+
+    query = (
+        db.query(
+            Turno.id,
+            Turno.fecha,
+            Turno.hora,
+            Turno.nombre,
+            Turno.telefono,
+            Servicio.nombre.label("servicio"),
+            Barbero.nombre.label("barbero"),
+            Turno.barbero_id,
+            Turno.es_manual,
+            Turno.precio,
+            admin_propia,
+            admin_alquiler,
+            parte_barbero.label("parte_barbero"),
+        )
+        .join(Servicio, Turno.servicio_id == Servicio.id)
+        .outerjoin(Barbero, Turno.barbero_id == Barbero.id)
+        .filter(Turno.fecha >= desde, Turno.fecha <= hasta)
+    )
+
+    if barbero_id is not None:
+        query = query.filter(Turno.barbero_id == barbero_id)
+
+    return query.order_by(Turno.fecha, Turno.hora, Turno.id).statement
+
+
+def _fila_exportacion(f, columnas: list[str]) -> dict:
+    datos = f._asdict()
+
+    if datos["fecha"]:
+        datos["fecha"] = datos["fecha"].isoformat()
+    if datos["hora"]:
+        datos["hora"] = datos["hora"].strftime("%H:%M")
+
+    for columna in ("precio", "admin_propia", "admin_alquiler", "parte_barbero"):
+        datos[columna] = round(datos[columna], 2)
+
+    return {columna: datos[columna] for columna in columnas}
+
+
+def _respuesta_exportacion(stmt, columnas: list[str], formato: str, nombre: str):
+    serializar = lambda f: _fila_exportacion(f, columnas)
+
+    if formato == "csv":
+        cuerpo = csv_en_tandas(stmt, columnas, serializar)
+    else:
+        cuerpo = ndjson_en_tandas(stmt, serializar)
+
+    return StreamingResponse(
+        cuerpo,
+        media_type=FORMATOS_EXPORTACION[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nombre}.{formato}"'},
+    )
+
+
+@router.get("/exportar/turnos")
+def exportar_turnos(
+    desde: date,
+    hasta: date,
+    formato: str = Query("csv", pattern="^(csv|ndjson)$"),
+    barbero_id: int | None = None,
+    db: Session = Depends(get_db),
+    user=Depends(admin_required),
+):
+    stmt = _consulta_exportacion(db, desde, hasta, barbero_id)
+
+    return _respuesta_exportacion(
+        stmt, COLUMNAS_EXPORTAR_TURNOS, formato, f"turnos_{desde}_{hasta}"
+    )
+
+
+@router.get("/exportar/ganancias")
+def exportar_ganancias(
+    desde: date,
+    hasta: date,
+    formato: str = Query("csv", pattern="^(csv|ndjson)$"),
+    barbero_id: int | None = None,
+    db: Session = Depends(get_db),
+    user=Depends(admin_required),
+):
+    stmt = _consulta_exportacion(db, desde, hasta, barbero_id)
+
+    return _respuesta_exportacion(
+        stmt, COLUMNAS_EXPORTAR_GANANCIAS, formato, f"ganancias_{desde}_{hasta}"
+    )
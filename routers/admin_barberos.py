@@ -1,45 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, Header
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, extract
+from sqlalchemy import func
 from database import get_db
 from models import RolEnum, Usuario, Turno
-from auth.security import decode_token
-from datetime import date
+from auth.deps import admin_required
+from auth.sesiones import invalidar_usuario, registrar_cambio_usuario
+from datetime import date, timedelta
 from passlib.context import CryptContext
 
+from services.disponibilidad import registrar_cambio_profesionales
 from utils.horarios import generar_horarios_barbero
 
 router = APIRouter()
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
-# =========================
-# HELPER VALIDAR ADMIN
-# =========================
-def get_admin_from_token(authorization: str, db: Session):
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Token inválido")
-
-    token = authorization.replace("Bearer ", "").strip()
-    payload = decode_token(token)
-
-    user_id = payload.get("user_id")
-    if not user_id:
-        raise HTTPException(status_code=401, detail="Token inválido")
-
-    admin = db.query(Usuario).filter_by(
-        id=user_id,
-        rol=RolEnum.admin
-    ).first()
-
-    if not admin:
-        raise HTTPException(status_code=403, detail="No autorizado")
-
-    return admin
-
-
-
 # =========================
 # VER TODOS LOS USUARIOS(ADMIN)
 # =========================
@@ -69,8 +45,14 @@ def cambiar_rol(user_id: int, data: dict, db: Session = Depends(get_db)):
 
     nuevo_rol = RolEnum(data["rol"])
     user.rol = nuevo_rol
+    registrar_cambio_profesionales(db)
+    # Todos los workers olvidan el rol viejo cuando se confirma
+    registrar_cambio_usuario(db, user.id)
     db.commit()
 
+    # En este worker ya mismo, sin esperar el aviso del bus
+    invalidar_usuario(user.id)
+
     # 🔹 generar agenda si se vuelve barbero
     if nuevo_rol == RolEnum.barbero:
         generar_horarios_barbero(db, user)
@@ -82,10 +64,8 @@ def cambiar_rol(user_id: int, data: dict, db: Session = Depends(get_db)):
 @router.get("/barberos")
 def ver_barberos(
     db: Session = Depends(get_db),
-    authorization: str = Header(...)
+    user=Depends(admin_required)
 ):
-    get_admin_from_token(authorization, db)
-
     barberos = db.query(Usuario).filter_by(
         rol=RolEnum.barbero
     ).all()
@@ -103,10 +83,8 @@ def ver_barberos(
 def panel_barbero_admin(
     barbero_id: int,
     db: Session = Depends(get_db),
-    authorization: str = Header(...)
+    user=Depends(admin_required)
 ):
-    get_admin_from_token(authorization, db)
-
     barbero = db.query(Usuario).filter_by(
         id=barbero_id,
         rol=RolEnum.barbero
@@ -125,30 +103,24 @@ def panel_barbero_admin(
         .all()
     )
 
-    # 🔹 Dinero diario desde DB
-    dinero_diario = (
-        db.query(func.coalesce(func.sum(Turno.precio), 0))
-        .join(Turno.horario)
-        .filter(
-            Turno.barbero_id == barbero.id,
-            Turno.horario.has(fecha=hoy)
-        )
-        .scalar()
-    )
-
-    # 🔹 Turnos del mes
-    turnos_mes = (
-        db.query(Turno)
-        .join(Turno.horario)
-        .filter(
-            Turno.barbero_id == barbero.id,
-            extract("month", Turno.horario.property.mapper.class_.fecha) == hoy.month,
-            extract("year", Turno.horario.property.mapper.class_.fecha) == hoy.year
+    # 🔹 Dinero del día y del mes: rangos [inicio, fin) sobre Turno.fecha
+    # (usan ix_turno_barbero_fecha, sin leer los turnos)
+    inicio_mes = hoy.replace(day=1)
+    fin_mes = date(hoy.year + 1, 1, 1) if hoy.month == 12 else date(hoy.year, hoy.month + 1, 1)
+
+    def dinero_entre(inicio: date, fin: date):
+        return (
+            db.query(func.coalesce(func.sum(Turno.precio), 0))
+            .filter(
+                Turno.barbero_id == barbero.id,
+                Turno.fecha >= inicio,
+                Turno.fecha < fin,
+            )
+            .scalar()
         )
-        .all()
-    )
 
-    dinero_mensual = sum(t.precio for t in turnos_mes)
+    dinero_diario = dinero_entre(hoy, hoy + timedelta(days=1))
+    dinero_mensual = dinero_entre(inicio_mes, fin_mes)
 
     return {
         "barbero": {
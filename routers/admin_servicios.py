@@ -29,6 +29,9 @@ def actualizar_servicio(
     if "activo" in payload:
         servicio.activo = payload["activo"]
 
+    if "duracion" in payload:
+        servicio.duracion = payload["duracion"]
+
     db.commit()
     db.refresh(servicio)
 
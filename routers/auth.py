@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from database import SesionLocal
 from models import Usuario
-from auth.security import hash_password, verify_password, create_token
+from auth.claves import hashear_async, verificar_async
+from auth.security import create_token
 import re
 from pydantic import BaseModel
 from database import get_db
@@ -21,43 +23,76 @@ class UserLogin(BaseModel):
     email: str
     password: str
 
-@router.post("/registro")
-def registro(data: UserRegister, db: Session = Depends(get_db)):
-    if db.query(Usuario).filter_by(email=data.email).first():
-        raise HTTPException(400, "Email ya registrado")
+def _email_registrado(db: Session, email: str) -> bool:
+    return db.query(Usuario.id).filter_by(email=email).first() is not None
+
 
+def _crear_usuario(db: Session, data: UserRegister, hashed: str):
     user = Usuario(
         nombre=data.nombre,
         email=data.email,
-        password=hash_password(data.password),
+        password=hashed,
         rol="cliente"
     )
 
     db.add(user)
     db.commit()
+
+
+def _buscar_usuario(db: Session, email: str):
+    return db.query(Usuario).filter_by(email=email).first()
+
+
+def _actualizar_hash(db: Session, user: Usuario, hashed: str):
+    user.password = hashed
+    db.commit()
+
+
+# bcrypt corre en el pool de procesos (auth/claves.py) y la base en el
+# threadpool: el event loop queda libre mientras tanto
+@router.post("/registro")
+async def registro(data: UserRegister, db: Session = Depends(get_db)):
+    if await run_in_threadpool(_email_registrado, db, data.email):
+        raise HTTPException(400, "Email ya registrado")
+
+    hashed = await hashear_async(data.password)
+    await run_in_threadpool(_crear_usuario, db, data, hashed)
+
     return {"ok": True}
 
 @router.post("/acceso")
-def acceso(data: UserLogin, db: Session = Depends(get_db)):
-    user = db.query(Usuario).filter_by(email=data.email).first()
+async def acceso(data: UserLogin, db: Session = Depends(get_db)):
+    user = await run_in_threadpool(_buscar_usuario, db, data.email)
 
-    if not user or not verify_password(data.password, user.password):
+    if not user or not user.password:
         raise HTTPException(401, "Credenciales incorrectas")
 
+    ok, nuevo_hash = await verificar_async(data.password, user.password)
+    if not ok:
+        raise HTTPException(401, "Credenciales incorrectas")
+
+    # Datos leídos antes del commit: expire_on_commit los vaciaría y
+    # leerlos después sería ir a la base desde el event loop
+    datos = {
+        "id": user.id,
+        "nombre": user.nombre,
+        "email": user.email,
+        "rol": user.rol.value,
+        "telefono": user.telefono
+    }
+
+    # 🔁 Cambió BCRYPT_ROUNDS: se guarda el hash con el costo nuevo
+    if nuevo_hash:
+        await run_in_threadpool(_actualizar_hash, db, user, nuevo_hash)
+
     token = create_token({
-    "user_id": user.id,        # 🔥 CLAVE
-    "email": user.email,
-    "rol": user.rol.value,
-    "telefono": user.telefono
+    "user_id": datos["id"],        # 🔥 CLAVE
+    "email": datos["email"],
+    "rol": datos["rol"],
+    "telefono": datos["telefono"]
 })
 
     return {
         "access_token": token,
-        "user": {
-            "id": user.id,
-            "nombre": user.nombre,
-            "email": user.email,
-            "rol": user.rol.value,
-            "telefono": user.telefono
-        }
+        "user": datos
     }
@@ -1,31 +1,30 @@
+import logging
 from fastapi import APIRouter, HTTPException, Depends
-from google.oauth2 import id_token
-from google.auth.transport import requests
 from sqlalchemy.orm import Session
 from database import SesionLocal
 from models import RolEnum, Usuario
+from auth.google_certs import verificar_id_token
 from auth.security import create_token
 from database import get_db
+from services.disponibilidad import registrar_cambio_profesionales
 
 import os
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
 ADMIN_EMAIL = os.getenv("ADMIN_EMAIL")
 
 
-print("GOOGLE_CLIENT_ID:", GOOGLE_CLIENT_ID)
 @router.post("/auth/google")
 def login_google(payload: dict, db: Session = Depends(get_db)):
     try:
         token = payload["credential"]
 
-        idinfo = id_token.verify_oauth2_token(
-            token,
-            requests.Request(),
-            GOOGLE_CLIENT_ID
-        )
+        # Certificados cacheados (auth/google_certs.py)
+        idinfo = verificar_id_token(token, GOOGLE_CLIENT_ID)
 
         email = idinfo["email"]
         nombre = idinfo.get("name", "")
@@ -39,6 +38,10 @@ def login_google(payload: dict, db: Session = Depends(get_db)):
                 rol=RolEnum.admin if email == ADMIN_EMAIL else RolEnum.cliente
             )
             db.add(user)
+
+            if user.rol == RolEnum.admin:
+                registrar_cambio_profesionales(db)
+
             db.commit()
             db.refresh(user)
 
@@ -63,6 +66,5 @@ def login_google(payload: dict, db: Session = Depends(get_db)):
         }
 
     except Exception as e:
-        print("ERROR GOOGLE AUTH TYPE:", type(e))
-        print("ERROR GOOGLE AUTH:", str(e))
+        logger.warning("❌ Login con Google rechazado: %s: %s", type(e).__name__, e)
         raise HTTPException(status_code=401, detail=str(e))
@@ -8,12 +8,19 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
 from auth.deps import barbero_required, empleado_required
-from auth.security import decode_token
 from database import get_db
 from models import Turno, Usuario, Horario, Servicio
 from pydantic import BaseModel
 
 from schemas import HorarioOut
+from services import agenda_virtual
+from services.disponibilidad import registrar_cambio_horario
+from services.reservas import (
+    asignar_extras,
+    horarios_del_bloque,
+    liberar_extras,
+    reclamar_horarios,
+)
 
 router = APIRouter()
 
@@ -129,12 +136,9 @@ def editar_turno(
             ):
                 pass
             else:
-                nuevo_horario = db.query(Horario).filter(
-                    Horario.fecha == data.fecha,
-                    Horario.hora == nueva_hora,
-                    Horario.barbero_id == user.id,
-                    Horario.disponible == True
-                ).first()
+                nuevo_horario = agenda_virtual.obtener_horario(
+                    db, user.id, data.fecha, nueva_hora
+                )
 
                 if not nuevo_horario:
                     raise HTTPException(
@@ -142,17 +146,28 @@ def editar_turno(
                         detail="Horario no disponible"
                     )
 
+            # Ocupar el nuevo (UPDATE condicional, sin pisar otra reserva)
+                if not reclamar_horarios(db, [nuevo_horario]):
+                    db.rollback()
+                    raise HTTPException(
+                        status_code=409,
+                        detail="El horario ya fue reservado"
+                    )
+
             # Liberar horario anterior
                 horario_actual.disponible = True
-
-            # Ocupar el nuevo
-                nuevo_horario.disponible = False
                 turno.horario = nuevo_horario
+                turno.fecha = nuevo_horario.fecha
+                turno.hora = nuevo_horario.hora
+                turno.recordatorio_enviado = 0
+
+                registrar_cambio_horario(db, horario_actual)
 
         else:
         # Turno manual (sin horario asociado)
             turno.fecha = data.fecha
             turno.hora = nueva_hora
+            turno.recordatorio_enviado = 0
 
     # =========================
     # CAMBIO DE SERVICIO (OPCIONAL)
@@ -169,9 +184,26 @@ def editar_turno(
                 detail="Servicio no encontrado"
             )
 
+        turno.servicio_id = servicio.id
         turno.servicio = servicio
         turno.precio = servicio.precio
 
+    # =========================
+    # DURACIÓN (horarios extra del servicio)
+    # =========================
+    if turno.horario and ((data.fecha and data.hora) or data.servicio_id):
+        liberar_extras(db, turno)
+        bloque = horarios_del_bloque(db, turno.horario, turno.servicio)
+
+        if not bloque or not reclamar_horarios(db, bloque[1:]):
+            db.rollback()
+            raise HTTPException(
+                status_code=400,
+                detail="No hay lugar para la duración del servicio"
+            )
+
+        asignar_extras(turno, bloque)
+
     db.commit()
     db.refresh(turno)
 
@@ -189,6 +221,18 @@ def get_horarios_barbero(
     Devuelve solo los horarios del barbero logueado
     Ordenados por fecha y hora
     """
+    if agenda_virtual.ACTIVA:
+        horarios = agenda_virtual.slots(db, [user.id], date.today())
+
+        return [
+            {
+                "id": h.id,
+                "fecha": h.fecha.isoformat(),
+                "hora": h.hora.strftime("%H:%M"),
+                "disponible": h.disponible
+            }
+            for h in horarios
+        ]
 
     horarios = (
         db.query(Horario)
@@ -213,16 +257,28 @@ def toggle_horario_barbero(
     db: Session = Depends(get_db),
     user=Depends(barbero_required)
 ):
+    # 🔒 Lock de fila: no cruzarse con una reserva en curso
     horario = db.query(Horario).filter(
         Horario.id == horario_id,
         Horario.barbero_id == user.id
-    ).first()
+    ).with_for_update().first()
 
     if not horario:
         raise HTTPException(status_code=404, detail="Horario no encontrado")
 
+    # ❌ No tocar horarios de un turno (el principal ni los extra)
+    turno_existente = db.query(Turno).filter_by(horario_id=horario.id).first()
+    if turno_existente or horario.turno_extra_id:
+        raise HTTPException(
+            status_code=400,
+            detail="No se puede bloquear un horario con turno asignado"
+        )
+
     # Cambiar disponible a True/False
     horario.disponible = not horario.disponible
+    horario.hold_hasta = None
+    horario.hold_usuario_id = None
+    registrar_cambio_horario(db, horario)
     db.commit()
     db.refresh(horario)
 
@@ -247,6 +303,9 @@ def cancelar_turno_barbero(
 
     if turno.horario:
         turno.horario.disponible = True
+        registrar_cambio_horario(db, turno.horario)
+
+    liberar_extras(db, turno)
 
     db.delete(turno)
     db.commit()
@@ -1,10 +1,18 @@
+import asyncio
+import json
+from types import SimpleNamespace
 from zoneinfo import ZoneInfo
 
-from fastapi import APIRouter, Depends, HTTPException, Header
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from database import SesionLocal
 from models import Horario, RolEnum, Turno, Usuario, Servicio
-from auth.security import decode_token
+from auth.deps import cliente_required
+from auth.sesiones import UsuarioActual, invalidar_usuario, registrar_cambio_usuario
 from pydantic import BaseModel, Field
 from datetime import date, timedelta, time
 import calendar
@@ -12,8 +20,29 @@ from datetime import datetime
 from database import get_db
 
 
+from services import agenda_virtual, eventos, idempotencia
+from services.cache_disponibilidad import cache_calendario
+from services.calendario_service import buscar_proximo_libre, consultar_calendario
+from services.reservas import (
+    asignar_extras,
+    buscar_bloques,
+    horarios_del_bloque,
+    libre_para,
+    reclamar_horarios,
+    retener_horario,
+    soltar_retencion,
+)
+from services.disponibilidad import (
+    CLAVE_PROFESIONALES,
+    calcular_etag,
+    clave_barbero,
+    obtener_version,
+    obtener_version_global,
+    registrar_cambio_agenda,
+    respuesta_no_modificada,
+)
 from utils import horarios
-from utils.email import enviar_email_confirmacion
+from utils.email import encolar_email_confirmacion
 
 router = APIRouter()
 
@@ -23,7 +52,20 @@ class SolicitudTurno(BaseModel):
     telefono: str = Field(..., min_length=8, max_length=20)
     servicio_id: int
     horario_id: int | None = None
-   
+
+    # Agenda virtual: el slot todavía no tiene horario_id
+    barbero_id: int | None = None
+    fecha: date | None = None
+    hora: time | None = None
+
+
+class SolicitudRetencion(BaseModel):
+    horario_id: int | None = None
+
+    # Agenda virtual
+    barbero_id: int | None = None
+    fecha: date | None = None
+    hora: time | None = None
 
 
 class RegistroManualRequest(BaseModel):
@@ -39,50 +81,350 @@ class RegistroManualRequest(BaseModel):
 # OBTENER TODO EL CALENDARIO
 # --------------------------------------------------
 @router.get("/calendario/{barbero_id}")
-def calendario(barbero_id: int, db: Session = Depends(get_db)):
+def calendario(
+    barbero_id: int,
+    request: Request,
+    response: Response,
+    formato: str = Query("lista", pattern="^(lista|compacto)$"),
+    desde: date | None = None,
+    hasta: date | None = None,
+    cursor: str | None = None,
+    limite: int | None = Query(None, ge=1, le=1000),
+    db: Session = Depends(get_db),
+):
 
-    # 🔎 Validar que el profesional exista (admin o barbero)
-    profesional = db.query(Usuario).filter(
-        Usuario.id == barbero_id,
-        Usuario.rol.in_([RolEnum.barbero, RolEnum.admin])
-    ).first()
+    # 🏷️ ETag: si nada cambió desde la última consulta → 304
+    version = obtener_version(db, clave_barbero(barbero_id))
+    etag = calcular_etag(
+        clave_barbero(barbero_id), version, date.today(), request.url.query
+    )
 
-    if not profesional:
-        raise HTTPException(
-            status_code=404,
-            detail="Profesional no encontrado"
+    no_modificado = respuesta_no_modificada(request, response, etag)
+    if no_modificado:
+        return no_modificado
+
+    # ⚡ Cache en memoria (la versión en la clave evita servir datos viejos
+    # aunque el cambio haya ocurrido en otro worker)
+    clave = (
+        barbero_id, version, date.today(),
+        formato, desde, hasta, cursor, limite,
+    )
+
+    en_cache = cache_calendario.obtener(clave)
+    if en_cache is not None:
+        cuerpo, siguiente = en_cache
+    else:
+        # 🔎 Validar que el profesional exista (admin o barbero)
+        profesional = db.query(Usuario.id).filter(
+            Usuario.id == barbero_id,
+            Usuario.rol.in_([RolEnum.barbero, RolEnum.admin])
+        ).first()
+
+        if not profesional:
+            raise HTTPException(
+                status_code=404,
+                detail="Profesional no encontrado"
+            )
+
+        cuerpo, siguiente = consultar_calendario(
+            db, barbero_id, formato, desde, hasta, cursor, limite
         )
+        cache_calendario.guardar(barbero_id, clave, (cuerpo, siguiente))
+
+    if siguiente:
+        response.headers["X-Next-Cursor"] = siguiente
+
+    return cuerpo
+
+
+# --------------------------------------------------
+# DISPONIBILIDAD DE TODOS LOS PROFESIONALES
+# --------------------------------------------------
+@router.get("/disponibilidad")
+def disponibilidad_general(
+    request: Request,
+    response: Response,
+    desde: date | None = None,
+    hasta: date | None = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Vista "cualquier barbero": para cada fecha/hora, qué profesionales
+    están libres y el horario_id de cada uno (mismo orden).
+    """
+    version = obtener_version_global(db)
+    etag = calcular_etag("disponibilidad", version, date.today(), request.url.query)
+
+    no_modificado = respuesta_no_modificada(request, response, etag)
+    if no_modificado:
+        return no_modificado
 
     hoy = date.today()
+    desde = max(desde, hoy) if desde else hoy
+
+    profesionales = db.query(Usuario).filter(
+        Usuario.rol.in_([RolEnum.barbero, RolEnum.admin])
+    ).order_by(Usuario.id).all()
 
-    horarios = (
-    db.query(Horario)
-    .filter(
-        Horario.barbero_id == barbero_id,
-        Horario.disponible == True,
-        Horario.fecha >= hoy,
+    if agenda_virtual.ACTIVA:
+        filas = _agrupar_slots_virtuales(
+            agenda_virtual.slots(db, [p.id for p in profesionales], desde, hasta)
+        )
+    else:
+        filas = _consultar_disponibilidad_agrupada(db, desde, hasta)
+
+    return {
+        "profesionales": [
+            {"id": p.id, "nombre": p.nombre, "foto_url": p.foto_url}
+            for p in profesionales
+        ],
+        "horarios": [
+            {
+                "fecha": f.fecha.isoformat(),
+                "hora": f.hora.strftime("%H:%M"),
+                "barberos": f.barberos,
+                "horario_ids": f.horario_ids,
+            }
+            for f in filas
+        ],
+    }
+
+
+def _consultar_disponibilidad_agrupada(db: Session, desde: date, hasta: date | None):
+    # 🔥 Una sola query agrupada por fecha/hora
+    query = (
+        db.query(
+            Horario.fecha,
+            Horario.hora,
+            func.array_agg(
+                aggregate_order_by(Horario.barbero_id, Horario.barbero_id)
+            ).label("barberos"),
+            func.array_agg(
+                aggregate_order_by(Horario.id, Horario.barbero_id)
+            ).label("horario_ids"),
+        )
+        .join(Usuario, Usuario.id == Horario.barbero_id)
+        .filter(
+            Usuario.rol.in_([RolEnum.barbero, RolEnum.admin]),
+            Horario.disponible == True,
+            Horario.fecha >= desde,
+            func.extract("dow", Horario.fecha) != 0,  # ❌ sin domingos
+        )
     )
-    .order_by(Horario.fecha, Horario.hora)
-    .all()
-)
 
-    # ❌ filtrar domingos en Python
-    horarios = [
-        h for h in horarios
-        if h.fecha.weekday() != 6
-    ]
+    if hasta:
+        query = query.filter(Horario.fecha <= hasta)
+
+    return (
+        query
+        .group_by(Horario.fecha, Horario.hora)
+        .order_by(Horario.fecha, Horario.hora)
+        .all()
+    )
+
+
+def _agrupar_slots_virtuales(slots):
+    # Los slots ya vienen ordenados por fecha, hora y barbero
+    grupos = []
+    for s in slots:
+        if not s.disponible:
+            continue
+
+        if not grupos or (grupos[-1].fecha, grupos[-1].hora) != (s.fecha, s.hora):
+            grupos.append(SimpleNamespace(
+                fecha=s.fecha, hora=s.hora, barberos=[], horario_ids=[]
+            ))
+
+        grupos[-1].barberos.append(s.barbero_id)
+        grupos[-1].horario_ids.append(s.id)
+
+    return grupos
+
+
+# --------------------------------------------------
+# BLOQUES LIBRES PARA LA DURACIÓN DE UN SERVICIO
+# --------------------------------------------------
+@router.get("/calendario/{barbero_id}/bloques")
+def bloques_libres(
+    barbero_id: int,
+    servicio_id: int,
+    desde: date | None = None,
+    hasta: date | None = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Horarios de inicio donde entra el servicio completo
+    (por defecto, el próximo mes).
+    """
+    servicio = db.query(Servicio).filter(
+        Servicio.id == servicio_id,
+        Servicio.activo == True
+    ).first()
+
+    if not servicio:
+        raise HTTPException(status_code=400, detail="Servicio inválido")
+
+    hoy = date.today()
+    desde = max(desde, hoy) if desde else hoy
+    hasta = hasta or desde + timedelta(days=30)
+
+    if agenda_virtual.ACTIVA:
+        filas = agenda_virtual.slots(db, [barbero_id], desde, hasta)
+    else:
+        filas = (
+            db.query(
+                Horario.barbero_id, Horario.fecha, Horario.hora,
+                Horario.id, Horario.disponible,
+            )
+            .filter(
+                Horario.barbero_id == barbero_id,
+                Horario.fecha >= desde,
+                Horario.fecha <= hasta,
+            )
+            .all()
+        )
 
-    # ⚠️ No devolver 404 si no hay horarios
-    # Simplemente devolver lista vacía
     return [
         {
-            "id": h.id,
-            "fecha": h.fecha.isoformat(),
-            "hora": h.hora.strftime("%H:%M"),
-            "disponible": h.disponible,
+            "id": b[0].id,
+            "fecha": b[0].fecha.isoformat(),
+            "hora": b[0].hora.strftime("%H:%M"),
+            "horario_ids": [f.id for f in b],
         }
-        for h in horarios
+        for b in buscar_bloques(filas, servicio)
+        if b[0].fecha.weekday() != 6
     ]
+
+
+# --------------------------------------------------
+# PRÓXIMO TURNO DISPONIBLE
+# --------------------------------------------------
+@router.get("/proximo-turno")
+def proximo_turno(
+    barbero_id: int | None = None,
+    dias_semana: list[int] | None = Query(None),
+    hora_desde: time | None = None,
+    hora_hasta: time | None = None,
+    servicio_id: int | None = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Primer turno libre desde ahora. `dias_semana`: 0 = lunes ... 6 = domingo.
+    Con `servicio_id`, solo horarios donde entra toda su duración.
+    """
+    servicio = None
+    if servicio_id is not None:
+        servicio = db.query(Servicio).filter(
+            Servicio.id == servicio_id,
+            Servicio.activo == True
+        ).first()
+
+        if not servicio:
+            raise HTTPException(status_code=400, detail="Servicio inválido")
+
+    profesionales = db.query(Usuario.id).filter(
+        Usuario.rol.in_([RolEnum.barbero, RolEnum.admin])
+    )
+
+    if barbero_id is not None:
+        profesionales = profesionales.filter(Usuario.id == barbero_id)
+
+    barbero_ids = [p.id for p in profesionales]
+
+    if barbero_id is not None and not barbero_ids:
+        raise HTTPException(status_code=404, detail="Profesional no encontrado")
+
+    libre = buscar_proximo_libre(
+        db,
+        barbero_ids,
+        datetime.now(tz=ZONA).replace(tzinfo=None),
+        dias_semana,
+        hora_desde,
+        hora_hasta,
+        servicio,
+    )
+
+    if not libre:
+        raise HTTPException(status_code=404, detail="No hay turnos disponibles")
+
+    return {
+        "id": libre.id,
+        "barbero_id": libre.barbero_id,
+        "fecha": libre.fecha.isoformat(),
+        "hora": libre.hora.strftime("%H:%M"),
+    }
+
+
+# --------------------------------------------------
+# EVENTOS EN VIVO (SSE)
+# --------------------------------------------------
+@router.get("/calendario/{barbero_id}/eventos")
+async def eventos_calendario(barbero_id: int, request: Request):
+    """
+    Stream Server-Sent Events con los cambios de disponibilidad
+    del barbero: slot-tomado, slot-liberado y agenda-actualizada.
+    """
+    cola = eventos.bus.suscribir(barbero_id)
+
+    async def stream():
+        try:
+            yield "retry: 5000\n\n"
+
+            while not await request.is_disconnected():
+                try:
+                    evento = await asyncio.wait_for(cola.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    # 💓 keep-alive para proxies
+                    yield ": ping\n\n"
+                    continue
+
+                yield f"event: {evento['tipo']}\ndata: {json.dumps(evento)}\n\n"
+        finally:
+            eventos.bus.desuscribir(barbero_id, cola)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# --------------------------------------------------
+# RESOLVER SLOT DEL FORMATO COMPACTO → HORARIO
+# --------------------------------------------------
+@router.get("/calendario/{barbero_id}/slot")
+def resolver_slot(
+    barbero_id: int,
+    fecha: date,
+    indice: int = Query(..., ge=0),
+    db: Session = Depends(get_db),
+):
+    # El índice corresponde a la posición de la hora en la grilla del día
+    if agenda_virtual.ACTIVA:
+        grilla = agenda_virtual.slots(db, [barbero_id], fecha, fecha)
+        horario = grilla[indice] if indice < len(grilla) else None
+    else:
+        horario = (
+            db.query(Horario.id, Horario.fecha, Horario.hora, Horario.disponible)
+            .filter(
+                Horario.barbero_id == barbero_id,
+                Horario.fecha == fecha,
+            )
+            .order_by(Horario.hora)
+            .offset(indice)
+            .limit(1)
+            .first()
+        )
+
+    if not horario:
+        raise HTTPException(status_code=404, detail="Horario no encontrado")
+
+    return {
+        "id": horario.id,
+        "fecha": horario.fecha.isoformat(),
+        "hora": horario.hora.strftime("%H:%M"),
+        "disponible": horario.disponible,
+    }
 # --------------------------------------------------
 # GENERAR TODO EL AÑO (UNA SOLA VEZ)
 # --------------------------------------------------
@@ -91,6 +433,10 @@ def preparar_calendario(db: Session = Depends(get_db)):
 
     from datetime import datetime, timedelta
 
+    # 🧩 Agenda virtual: los horarios salen de las reglas, no se generan
+    if agenda_virtual.ACTIVA:
+        return {"ok": True, "agenda_virtual": True, "horarios_creados": 0}
+
     anio = date.today().year
 
     # 🔥 calcular próximo martes
@@ -210,6 +556,9 @@ def preparar_calendario(db: Session = Depends(get_db)):
 
         actual += timedelta(days=1)
 
+    for barbero in barberos:
+        registrar_cambio_agenda(db, barbero.id)
+
     db.commit()
 
     return {
@@ -274,47 +623,51 @@ def preparar_servicios(db: Session = Depends(get_db)):
 # --------------------------------------------------
 ZONA = ZoneInfo("America/Argentina/Buenos_Aires")
 
+HORARIO_TOMADO = "El horario ya fue reservado"
+
 @router.post("/reservar")
 def reservar(
     data: SolicitudTurno,
+    request: Request,
     db: Session = Depends(get_db),
-    authorization: str = Header(...)
+    usuario: UsuarioActual = Depends(cliente_required),
+    authorization: str | None = Header(None),
+    idempotency_key: str | None = Header(None, alias="Idempotency-Key"),
 ):
-    # 1️⃣ Validar Authorization
-    if not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Token mal formado")
-
-    token = authorization.replace("Bearer ", "").strip()
-    payload = decode_token(token)
-
-    user_id = payload.get("user_id")
-    if not user_id:
-        raise HTTPException(status_code=401, detail="Token inválido")
-
-    # 2️⃣ Buscar usuario
-    usuario = db.query(Usuario).filter_by(id=user_id).first()
-    if not usuario:
-        raise HTTPException(status_code=401, detail="Usuario no encontrado")
-
-    if usuario.rol != RolEnum.cliente:
-        raise HTTPException(
-            status_code=403,
-            detail="Solo los clientes pueden reservar turnos"
-        )
-
-    # 3️⃣ Horario (opcional)
+    # 0️⃣ Reintento con la misma Idempotency-Key: respuesta guardada
+    clave = None
+    if idempotency_key:
+        clave = idempotencia.calcular_clave(authorization, idempotency_key, request)
+        previa = idempotencia.reclamar(db, clave)
+        if previa:
+            return previa
+
+    # 1️⃣ Horario (opcional)
     horario = None
 
     if data.horario_id:
         horario = db.query(Horario).filter(
-            Horario.id == data.horario_id,
-            Horario.disponible == True
+            Horario.id == data.horario_id
         ).first()
 
+        if not horario or agenda_virtual.bloqueado(
+            db, horario.barbero_id, horario.fecha, horario.hora
+        ):
+            raise HTTPException(400, "Horario no disponible")
+
+    elif data.barbero_id and data.fecha and data.hora:
+        # 🧩 Agenda virtual: el horario se materializa al reservarlo
+        horario = agenda_virtual.obtener_horario(
+            db, data.barbero_id, data.fecha, data.hora
+        )
+
         if not horario:
             raise HTTPException(400, "Horario no disponible")
 
-    # 4️⃣ Definir fecha y hora (CLAVE DEL FIX)
+    if horario and not libre_para(horario, usuario.id):
+        raise HTTPException(status_code=409, detail=HORARIO_TOMADO)
+
+    # 2️⃣ Definir fecha y hora (CLAVE DEL FIX)
     if horario:
         fecha_turno = horario.fecha
         hora_turno = horario.hora
@@ -338,7 +691,7 @@ def reservar(
             detail="No se pueden reservar fechas pasadas"
         )
 
-    # 5️⃣ Servicio
+    # 3️⃣ Servicio
     servicio = (
         db.query(Servicio)
         .filter(
@@ -351,14 +704,19 @@ def reservar(
     if not servicio:
         raise HTTPException(status_code=400, detail="Servicio inválido")
 
-    # 6️⃣ Update teléfono si viene vacío
-    if not usuario.telefono and data.telefono:
-        usuario.telefono = data.telefono
+    # 4️⃣ Update teléfono si viene vacío
+    telefono = usuario.telefono
+    if not telefono and data.telefono:
+        telefono = data.telefono
+        db.query(Usuario).filter(Usuario.id == usuario.id).update(
+            {Usuario.telefono: telefono}
+        )
+        registrar_cambio_usuario(db, usuario.id)
 
-    # 7️⃣ Crear turno (FIX IMPORTANTE)
+    # 5️⃣ Crear turno (FIX IMPORTANTE)
     turno = Turno(
         nombre=usuario.nombre,
-        telefono=usuario.telefono,
+        telefono=telefono,
         horario_id=horario.id if horario else None,
         usuario_id=usuario.id,
         servicio_id=servicio.id,
@@ -368,40 +726,130 @@ def reservar(
         hora=hora_turno
     )
 
-    # 8️⃣ Bloquear horario SOLO si existe
+    # 6️⃣ Ocupar los horarios que necesita el servicio.
+    # UPDATE ... WHERE disponible: si dos clientes llegan a la vez,
+    # Postgres serializa las filas y solo uno ve disponible = true
+    bloque = []
     if horario:
-        horario.disponible = False
+        bloque = horarios_del_bloque(db, horario, servicio)
 
-    db.add(turno)
-    db.commit()
-    db.refresh(turno)
+        if not bloque:
+            raise HTTPException(
+                status_code=400,
+                detail="Horario no disponible para la duración del servicio"
+            )
+
+        # Acepta el horario si lo retuvo este mismo cliente
+        if not reclamar_horarios(db, bloque, usuario.id):
+            db.rollback()
+            raise HTTPException(status_code=409, detail=HORARIO_TOMADO)
+
+    try:
+        db.add(turno)
+        db.flush()
+    except IntegrityError:
+        # Última defensa: turnos.horario_id es único
+        db.rollback()
+        raise HTTPException(status_code=409, detail=HORARIO_TOMADO)
+
+    asignar_extras(turno, bloque)
 
-    # 9️⃣ Email seguro
+    # 7️⃣ Email al outbox (sale con el commit, lo manda el worker)
     barbero_nombre = horario.barbero.nombre if horario else "Manual"
 
     if usuario.email:
-        try:
-            enviar_email_confirmacion(
-                destino=usuario.email,
-                nombre=usuario.nombre,
-                fecha=fecha_turno.strftime("%d/%m/%Y"),
-                hora=hora_turno.strftime("%H:%M"),
-                servicio=servicio.nombre,
-                precio=servicio.precio,
-                barbero=barbero_nombre
-            )
-        except Exception as e:
-            print("⚠️ Error enviando email:", e)
+        encolar_email_confirmacion(
+            db,
+            destino=usuario.email,
+            nombre=usuario.nombre,
+            fecha=fecha_turno.strftime("%d/%m/%Y"),
+            hora=hora_turno.strftime("%H:%M"),
+            servicio=servicio.nombre,
+            precio=servicio.precio,
+            barbero=barbero_nombre
+        )
 
-    return {
+    respuesta = {
         "ok": True,
         "mensaje": "Turno reservado correctamente",
         "turno_id": turno.id,
-        "telefono": usuario.telefono
+        "telefono": telefono
+    }
+    idempotencia.guardar(db, clave, respuesta)
+
+    db.commit()
+
+    if telefono != usuario.telefono:
+        invalidar_usuario(usuario.id)
+
+    return respuesta
+
+# --------------------------------------------------
+# RETENER HORARIO (mientras el cliente completa la reserva)
+# --------------------------------------------------
+@router.post("/retener")
+def retener(
+    data: SolicitudRetencion,
+    db: Session = Depends(get_db),
+    usuario: UsuarioActual = Depends(cliente_required),
+):
+    if data.horario_id:
+        horario = db.query(Horario).filter_by(id=data.horario_id).first()
+    elif data.barbero_id and data.fecha and data.hora:
+        horario = agenda_virtual.obtener_horario(
+            db, data.barbero_id, data.fecha, data.hora
+        )
+    else:
+        raise HTTPException(400, "Horario requerido")
+
+    if not horario or agenda_virtual.bloqueado(
+        db, horario.barbero_id, horario.fecha, horario.hora
+    ):
+        raise HTTPException(400, "Horario no disponible")
+
+    if datetime.combine(horario.fecha, horario.hora).replace(tzinfo=ZONA) <= datetime.now(tz=ZONA):
+        raise HTTPException(400, "No se pueden reservar fechas pasadas")
+
+    hasta = retener_horario(db, horario, usuario.id)
+
+    if hasta is None:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=HORARIO_TOMADO)
+
+    db.commit()
+
+    return {
+        "horario_id": horario.id,
+        "hold_hasta": hasta.isoformat(),
     }
 
+
+@router.delete("/retener/{horario_id}")
+def soltar(
+    horario_id: int,
+    db: Session = Depends(get_db),
+    usuario: UsuarioActual = Depends(cliente_required),
+):
+    if not soltar_retencion(db, horario_id, usuario.id):
+        raise HTTPException(status_code=404, detail="Retención no encontrada")
+
+    db.commit()
+    return {"ok": True}
+
+
 @router.get("/profesionales")
-def obtener_profesionales(db: Session = Depends(get_db)):
+def obtener_profesionales(
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+):
+    version = obtener_version(db, CLAVE_PROFESIONALES)
+    etag = calcular_etag(CLAVE_PROFESIONALES, version)
+
+    no_modificado = respuesta_no_modificada(request, response, etag)
+    if no_modificado:
+        return no_modificado
+
     profesionales = db.query(Usuario).filter(
         Usuario.rol.in_([RolEnum.barbero, RolEnum.admin])
     ).all()
@@ -433,6 +881,13 @@ def limpiar_14(db: Session = Depends(get_db)):
         Horario.disponible == True       # Solo horarios libres
     ).delete(synchronize_session=False)
 
+    profesionales = db.query(Usuario.id).filter(
+        Usuario.rol.in_([RolEnum.barbero, RolEnum.admin])
+    ).all()
+
+    for p in profesionales:
+        registrar_cambio_agenda(db, p.id)
+
     db.commit()
 
     return {"ok": True, "mensaje": f"Se eliminaron {eliminados} horarios de 14:00"}
\ No newline at end of file
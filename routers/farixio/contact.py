@@ -1,9 +1,12 @@
+import logging
 from fastapi import APIRouter
 from pydantic import BaseModel
 
 import os
 import resend
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 resend.api_key = os.getenv("RESEND_API_KEY")
@@ -47,7 +50,7 @@ def contact(data: ContactForm):
         }
 
     except Exception as e:
-        print(e)
+        logger.exception("❌ Error enviando email de contacto: %s", e)
 
         return {
             "success": False,
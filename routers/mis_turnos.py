@@ -1,12 +1,15 @@
 # routers/turnos_usuario.py
-from fastapi import APIRouter, Depends, HTTPException, Header
+from fastapi import APIRouter, Depends, HTTPException, Header, Request
 from sqlalchemy.orm import Session, joinedload
-from auth.deps import get_current_user
+from auth.deps import get_claims
+from auth.sesiones import Claims
 from database import get_db
 from models import Turno, Usuario, Horario, Servicio
-from auth.security import decode_token
 from datetime import datetime
-from utils.email import enviar_email_cancelacion
+from services import idempotencia
+from services.disponibilidad import registrar_cambio_horario
+from services.reservas import liberar_extras
+from utils.email import encolar_email_cancelacion
 
 router = APIRouter()
 
@@ -17,21 +20,13 @@ router = APIRouter()
 @router.get("/mis-turnos")
 def mis_turnos(
     db: Session = Depends(get_db),
-    authorization: str = Header(...)
+    claims: Claims = Depends(get_claims)
 ):
-    if not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Token mal formado")
-
-    token = authorization.replace("Bearer ", "").strip()
-    payload = decode_token(token)
-    user_id = payload.get("user_id")
-
-    if not user_id:
-        raise HTTPException(status_code=401, detail="Token inválido")
+    user_id = claims.user_id
 
     turnos = (
         db.query(Turno)
-        .join(Horario)
+        .join(Turno.horario)
         .join(Servicio)
         .filter(Turno.usuario_id == user_id)
         .order_by(Horario.fecha, Horario.hora)
@@ -57,19 +52,22 @@ def mis_turnos(
 @router.delete("/cancelar-turno/{turno_id}")
 def cancelar_turno(
     turno_id: int,
+    request: Request,
     db: Session = Depends(get_db),
-    authorization: str = Header(...)
+    claims: Claims = Depends(get_claims),
+    authorization: str | None = Header(None),
+    idempotency_key: str | None = Header(None, alias="Idempotency-Key"),
 ):
-    # 🔐 AUTH
-    if not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Token mal formado")
-
-    token = authorization.replace("Bearer ", "").strip()
-    payload = decode_token(token)
-    user_id = payload.get("user_id")
+    # 🔁 Reintento con la misma Idempotency-Key
+    clave = None
+    if idempotency_key:
+        clave = idempotencia.calcular_clave(authorization, idempotency_key, request)
+        previa = idempotencia.reclamar(db, clave)
+        if previa:
+            return previa
 
-    if not user_id:
-        raise HTTPException(status_code=401, detail="Token inválido")
+    # 🔐 AUTH (claims del token, sin ir a la base)
+    user_id = claims.user_id
 
     # 🔥 TRAER CON USUARIO (CLAVE)
     turno = (
@@ -97,32 +95,28 @@ def cancelar_turno(
             detail="No se pueden cancelar turnos pasados"
         )
 
-    # 📧 DEBUG
-    print("👤 USUARIO:", turno.usuario)
-    print("📧 EMAIL:", turno.usuario.email if turno.usuario else None)
-
-    # 📧 ENVIAR EMAIL (ANTES DE BORRAR)
-    try:
-        if turno.usuario and turno.usuario.email:
-            enviar_email_cancelacion(
-                destino=turno.usuario.email,
-                nombre=turno.usuario.nombre,
-                fecha=turno.horario.fecha,
-                hora=turno.horario.hora,
-                servicio=turno.servicio.nombre,
-            )
-            print("✅ Email cancelación enviado")
-        else:
-            print("⚠️ Usuario sin email")
-    except Exception as e:
-        print("❌ Error enviando email:", e)
+    # 📧 EMAIL DE CANCELACIÓN (outbox, sale con el commit)
+    if turno.usuario and turno.usuario.email:
+        encolar_email_cancelacion(
+            db,
+            destino=turno.usuario.email,
+            nombre=turno.usuario.nombre,
+            fecha=turno.horario.fecha,
+            hora=turno.horario.hora,
+            servicio=turno.servicio.nombre,
+        )
 
     # 🔓 LIBERAR HORARIO
     turno.horario.disponible = True
+    registrar_cambio_horario(db, turno.horario)
+    liberar_extras(db, turno)
 
     # 🗑 ELIMINAR
     db.delete(turno)
+
+    respuesta = {"ok": True, "mensaje": "Turno cancelado"}
+    idempotencia.guardar(db, clave, respuesta)
     db.commit()
 
-    return {"ok": True, "mensaje": "Turno cancelado"}
+    return respuesta
 
@@ -1,3 +1,4 @@
+from datetime import date, time
 from pydantic import BaseModel
 from typing import Optional
 
@@ -28,4 +29,11 @@ class RegistroManualCreate(BaseModel):
     nombre: str
     servicio_id: int
     precio: float
-    observaciones: str | None = None        
\ No newline at end of file
+    observaciones: str | None = None
+
+class ExcepcionCreate(BaseModel):
+    fecha: date
+    barbero_id: Optional[int] = None
+    hora_desde: Optional[time] = None
+    hora_hasta: Optional[time] = None
+    motivo: Optional[str] = None
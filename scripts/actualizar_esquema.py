@@ -0,0 +1,76 @@
+import sys
+import os
+from dotenv import load_dotenv
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+load_dotenv()
+
+from sqlalchemy import text
+
+from database import SesionLocal, engine
+from models import Base
+from services.resumen_diario import reconstruir
+
+# ========================
+# Crea tablas e índices que falten en una base ya existente.
+# create_all() solo crea tablas nuevas: los índices agregados
+# a tablas existentes hay que crearlos aparte.
+# ========================
+
+Base.metadata.create_all(bind=engine)
+print("✅ Tablas creadas/validadas")
+
+# Columnas nuevas en tablas existentes
+COLUMNAS = [
+    "ALTER TABLE servicios ADD COLUMN IF NOT EXISTS duracion INTEGER",
+    "ALTER TABLE horarios ADD COLUMN IF NOT EXISTS turno_extra_id INTEGER",
+    "ALTER TABLE horarios ADD COLUMN IF NOT EXISTS hold_hasta TIMESTAMP WITH TIME ZONE",
+    "ALTER TABLE turnos ADD COLUMN IF NOT EXISTS recordatorio_enviado INTEGER NOT NULL DEFAULT 0",
+    """
+    ALTER TABLE horarios ADD COLUMN IF NOT EXISTS hold_usuario_id INTEGER
+        REFERENCES usuarios (id) ON DELETE SET NULL
+    """,
+    """
+    DO $$ BEGIN
+        ALTER TABLE horarios ADD CONSTRAINT fk_horario_turno_extra
+            FOREIGN KEY (turno_extra_id) REFERENCES turnos (id) ON DELETE SET NULL;
+    EXCEPTION WHEN duplicate_object THEN NULL;
+    END $$
+    """,
+]
+
+with engine.begin() as conn:
+    for sentencia in COLUMNAS:
+        conn.execute(text(sentencia))
+
+print("✅ Columnas validadas")
+
+# Turnos viejos sin fecha/hora propias: se copian del horario.
+# Ganancias, paneles y resumen_diario filtran por turnos.fecha.
+with engine.begin() as conn:
+    completados = conn.execute(text("""
+        UPDATE turnos t
+        SET fecha = COALESCE(t.fecha, h.fecha),
+            hora = COALESCE(t.hora, h.hora)
+        FROM horarios h
+        WHERE t.horario_id = h.id
+          AND (t.fecha IS NULL OR t.hora IS NULL)
+    """)).rowcount
+
+print(f"✅ Turnos con fecha/hora completadas: {completados}")
+
+# El UPDATE no pasa por la sesión: el resumen se rehace entero
+if completados:
+    db = SesionLocal()
+    try:
+        filas = reconstruir(db)
+        db.commit()
+        print(f"✅ Resumen diario reconstruido: {filas} filas")
+    finally:
+        db.close()
+
+for tabla in Base.metadata.sorted_tables:
+    for indice in tabla.indexes:
+        indice.create(bind=engine, checkfirst=True)
+        print(f"✅ Índice {indice.name}")
+
+print("✅ Esquema actualizado")
@@ -58,6 +58,13 @@ print("✅ Horarios base generados/validados")
 # 2️⃣ Generar horarios reales para cada barbero (1 año)
 # ========================
 
+from services import agenda_virtual
+
+if agenda_virtual.ACTIVA:
+    db.close()
+    print("🧩 Agenda virtual activa: no se materializan horarios")
+    sys.exit(0)
+
 hoy = date.today()
 
 barberos = db.query(Usuario).filter(
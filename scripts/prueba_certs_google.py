@@ -0,0 +1,142 @@
+import sys
+import os
+import argparse
+import datetime
+import json
+import threading
+import time as reloj
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from dotenv import load_dotenv
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+load_dotenv()
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from google.auth import crypt, jwt
+
+# ========================
+# Servidor de certificados "tipo Google" en este proceso: firma
+# ID tokens con una clave propia y verifica que /auth/google
+# baje los certificados una sola vez mientras dura el max-age.
+#
+#   python scripts/prueba_certs_google.py --logins 200 --max-age 3600
+# ========================
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--logins", type=int, default=200)
+parser.add_argument("--max-age", type=int, default=3600)
+parser.add_argument("--latencia-ms", type=int, default=100)
+args = parser.parse_args()
+
+CLIENT_ID = "prueba.apps.googleusercontent.com"
+KID = "clave-prueba"
+
+# ========================
+# 1️⃣ Clave y certificado
+# ========================
+clave = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+nombre = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "prueba")])
+ahora = datetime.datetime.now(datetime.timezone.utc)
+
+certificado = (
+    x509.CertificateBuilder()
+    .subject_name(nombre)
+    .issuer_name(nombre)
+    .public_key(clave.public_key())
+    .serial_number(x509.random_serial_number())
+    .not_valid_before(ahora - datetime.timedelta(days=1))
+    .not_valid_after(ahora + datetime.timedelta(days=1))
+    .sign(clave, hashes.SHA256())
+)
+
+certs = {KID: certificado.public_bytes(serialization.Encoding.PEM).decode()}
+pem_privada = clave.private_bytes(
+    serialization.Encoding.PEM,
+    serialization.PrivateFormat.PKCS8,
+    serialization.NoEncryption(),
+).decode()
+
+# ========================
+# 2️⃣ Servidor de certificados
+# ========================
+descargas = []
+
+
+class CertsFalsos(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        reloj.sleep(args.latencia_ms / 1000)
+        descargas.append(self.path)
+
+        cuerpo = json.dumps(certs).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Cache-Control", f"public, max-age={args.max_age}")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, *args):
+        pass
+
+
+servidor = ThreadingHTTPServer(("127.0.0.1", 0), CertsFalsos)
+threading.Thread(target=servidor.serve_forever, daemon=True).start()
+
+# La app lee estas variables al importar
+os.environ["GOOGLE_CERTS_URL"] = f"http://127.0.0.1:{servidor.server_address[1]}/certs"
+os.environ["GOOGLE_CLIENT_ID"] = CLIENT_ID
+
+from auth.google_certs import cache_certificados, verificar_id_token
+
+print(f"🧪 Certificados falsos en {os.environ['GOOGLE_CERTS_URL']} "
+      f"({args.latencia_ms} ms, max-age {args.max_age})")
+
+# ========================
+# 3️⃣ Logins
+# ========================
+firmante = crypt.RSASigner.from_string(pem_privada, key_id=KID)
+
+
+def id_token(i: int) -> str:
+    segundos = int(reloj.time())
+    return jwt.encode(firmante, {
+        "iss": "https://accounts.google.com",
+        "aud": CLIENT_ID,
+        "sub": str(i),
+        "email": f"cliente{i}@prueba.invalid",
+        "iat": segundos,
+        "exp": segundos + 600,
+    }).decode()
+
+
+tokens = [id_token(i) for i in range(args.logins)]
+
+latencias = []
+for token in tokens:
+    inicio = reloj.perf_counter()
+    idinfo = verificar_id_token(token, CLIENT_ID)
+    latencias.append((reloj.perf_counter() - inicio) * 1000)
+
+latencias.sort()
+print(f"🔑 {args.logins} verificaciones: máx {latencias[-1]:.1f} ms (con descarga), "
+      f"p50 {latencias[len(latencias) // 2]:.2f} ms")
+print(f"🌐 Descargas de certificados: {len(descargas)}")
+
+# Token de otra audiencia: tiene que fallar
+try:
+    verificar_id_token(tokens[0], "otra-app")
+    rechazado = False
+except ValueError:
+    rechazado = True
+
+servidor.shutdown()
+
+if len(descargas) != 1 or cache_certificados.descargas != 1 or not rechazado:
+    print("❌ Los certificados no se cachearon o la audiencia no se validó")
+    sys.exit(1)
+
+print("✅ Certificados cacheados según Cache-Control")
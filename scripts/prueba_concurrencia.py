@@ -0,0 +1,164 @@
+import sys
+import os
+import argparse
+import statistics
+import time as reloj
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+load_dotenv()
+
+from datetime import date, time, timedelta
+from sqlalchemy import func
+
+from auth.security import create_token
+from database import SesionLocal
+from models import Horario, RolEnum, Servicio, Turno, Usuario
+
+# ========================
+# Prueba de carga de /reservar: muchos clientes reservando a la
+# vez los mismos horarios. Crea datos temporales, mide latencias
+# y verifica que ningún horario termine con dos turnos.
+#
+#   python scripts/prueba_concurrencia.py                  (en proceso)
+#   python scripts/prueba_concurrencia.py --url http://localhost:8000
+# ========================
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--url", help="API ya levantada (por defecto, en proceso)")
+parser.add_argument("--clientes", type=int, default=50)
+parser.add_argument("--horarios", type=int, default=4)
+parser.add_argument("--pedidos", type=int, default=400)
+parser.add_argument("--hilos", type=int, default=32)
+args = parser.parse_args()
+
+PREFIJO = f"prueba-concurrencia-{int(reloj.time())}"
+
+# ========================
+# 1️⃣ Datos temporales
+# ========================
+
+db = SesionLocal()
+
+barbero = Usuario(
+    nombre="Barbero prueba",
+    email=f"{PREFIJO}-barbero@prueba.invalid",
+    rol=RolEnum.barbero,
+)
+servicio = Servicio(nombre=f"{PREFIJO} corte", precio=1, activo=True)
+clientes = [
+    Usuario(
+        nombre=f"Cliente {i}",
+        email=f"{PREFIJO}-{i}@prueba.invalid",
+        rol=RolEnum.cliente,
+    )
+    for i in range(args.clientes)
+]
+
+db.add_all([barbero, servicio, *clientes])
+db.commit()
+
+# Un domingo lejano: no choca con la agenda real
+fecha = date.today() + timedelta(days=700)
+while fecha.weekday() != 6:
+    fecha += timedelta(days=1)
+
+horarios = [
+    Horario(fecha=fecha, hora=time(10 + i), disponible=True, barbero_id=barbero.id)
+    for i in range(args.horarios)
+]
+db.add_all(horarios)
+db.commit()
+
+horario_ids = [h.id for h in horarios]
+tokens = [
+    create_token({"user_id": c.id, "email": c.email, "rol": c.rol.value})
+    for c in clientes
+]
+
+print(f"🧪 {args.pedidos} reservas sobre {len(horario_ids)} horarios "
+      f"con {args.hilos} hilos")
+
+# ========================
+# 2️⃣ Cliente HTTP
+# ========================
+
+if args.url:
+    import httpx
+    http = httpx.Client(base_url=args.url, timeout=30)
+else:
+    from fastapi.testclient import TestClient
+    import main
+    http = TestClient(main.app)
+
+
+def reservar(i: int):
+    inicio = reloj.perf_counter()
+    r = http.post(
+        "/reservar",
+        headers={"Authorization": f"Bearer {tokens[i % len(tokens)]}"},
+        json={
+            "telefono": "1100000000",
+            "servicio_id": servicio.id,
+            "horario_id": horario_ids[i % len(horario_ids)],
+        },
+    )
+    return r.status_code, reloj.perf_counter() - inicio
+
+
+# ========================
+# 3️⃣ Carga
+# ========================
+
+inicio = reloj.perf_counter()
+with ThreadPoolExecutor(max_workers=args.hilos) as pool:
+    resultados = list(pool.map(reservar, range(args.pedidos)))
+total = reloj.perf_counter() - inicio
+
+codigos = {}
+for codigo, _ in resultados:
+    codigos[codigo] = codigos.get(codigo, 0) + 1
+
+latencias = sorted(d * 1000 for _, d in resultados)
+p50 = statistics.median(latencias)
+p99 = latencias[min(len(latencias) - 1, int(len(latencias) * 0.99))]
+
+# ========================
+# 4️⃣ Verificación
+# ========================
+
+db.expire_all()
+dobles = db.query(Turno.horario_id).filter(
+    Turno.horario_id.in_(horario_ids)
+).group_by(Turno.horario_id).having(func.count() > 1).all()
+
+reservados = db.query(Turno).filter(Turno.horario_id.in_(horario_ids)).count()
+
+print(f"📊 Códigos: {codigos}")
+print(f"⏱️ p50 {p50:.1f} ms | p99 {p99:.1f} ms | "
+      f"{args.pedidos / total:.0f} pedidos/s")
+print(f"📅 Turnos creados: {reservados} de {len(horario_ids)} horarios")
+
+ok = (
+    not dobles
+    and reservados == len(horario_ids)
+    and codigos.get(200, 0) == len(horario_ids)
+    and set(codigos) <= {200, 409}
+)
+
+# ========================
+# 5️⃣ Limpieza
+# ========================
+
+db.query(Turno).filter(Turno.horario_id.in_(horario_ids)).delete(synchronize_session=False)
+db.query(Horario).filter(Horario.id.in_(horario_ids)).delete(synchronize_session=False)
+db.query(Servicio).filter(Servicio.id == servicio.id).delete(synchronize_session=False)
+db.query(Usuario).filter(Usuario.email.like(f"{PREFIJO}-%")).delete(synchronize_session=False)
+db.commit()
+db.close()
+
+if not ok:
+    print("❌ Reservas dobles o respuestas inesperadas")
+    sys.exit(1)
+
+print("✅ Sin reservas dobles")
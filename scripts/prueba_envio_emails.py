@@ -0,0 +1,110 @@
+import sys
+import os
+import argparse
+import json
+import threading
+import time as reloj
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from dotenv import load_dotenv
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+load_dotenv()
+
+from services.correo import Mensaje, TransporteResend
+
+# ========================
+# Mide el envío de emails contra un servidor falso de Resend
+# (/emails y /emails/batch) levantado en este mismo proceso.
+# Compara mandar de a uno contra mandar por lotes.
+#
+#   python scripts/prueba_envio_emails.py --mensajes 500 --latencia-ms 80
+# ========================
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--mensajes", type=int, default=500)
+parser.add_argument("--latencia-ms", type=int, default=80)
+parser.add_argument("--puerto", type=int, default=0)
+args = parser.parse_args()
+
+recibidos = []
+recibidos_lock = threading.Lock()
+
+
+class ResendFalso(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_POST(self):
+        largo = int(self.headers.get("Content-Length", 0))
+        cuerpo = json.loads(self.rfile.read(largo))
+
+        reloj.sleep(args.latencia_ms / 1000)
+
+        if self.path == "/emails/batch":
+            emails = cuerpo
+        elif self.path == "/emails":
+            emails = [cuerpo]
+        else:
+            self.send_error(404)
+            return
+
+        with recibidos_lock:
+            recibidos.extend(emails)
+
+        respuesta = json.dumps({
+            "data": [{"id": f"falso-{i}"} for i in range(len(emails))]
+        }).encode()
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(respuesta)))
+        self.end_headers()
+        self.wfile.write(respuesta)
+
+    def log_message(self, *args):
+        pass
+
+
+servidor = ThreadingHTTPServer(("127.0.0.1", args.puerto), ResendFalso)
+threading.Thread(target=servidor.serve_forever, daemon=True).start()
+url = f"http://127.0.0.1:{servidor.server_address[1]}"
+
+print(f"🧪 Resend falso en {url} ({args.latencia_ms} ms por request)")
+
+transporte = TransporteResend(url=url, api_key="falsa")
+mensajes = [
+    Mensaje(f"cliente{i}@prueba.invalid", "Recordatorio", "<p>Hola</p>")
+    for i in range(args.mensajes)
+]
+
+# ========================
+# 1️⃣ De a uno
+# ========================
+inicio = reloj.perf_counter()
+for m in mensajes[:50]:
+    transporte.enviar(m)
+por_mensaje = (reloj.perf_counter() - inicio) / 50
+
+print(f"📨 De a uno: {por_mensaje * 1000:.0f} ms por email "
+      f"(~{por_mensaje * args.mensajes:.1f} s para {args.mensajes})")
+
+# ========================
+# 2️⃣ Por lotes
+# ========================
+recibidos.clear()
+
+inicio = reloj.perf_counter()
+errores = transporte.enviar_lote(mensajes)
+total = reloj.perf_counter() - inicio
+
+fallidos = [e for e in errores if e is not None]
+
+print(f"📦 Por lotes: {args.mensajes} emails en {total:.2f} s "
+      f"({TransporteResend.MAX_LOTE} por request, "
+      f"{TransporteResend.CONCURRENCIA} en paralelo)")
+
+servidor.shutdown()
+
+if fallidos or len(recibidos) != args.mensajes:
+    print(f"❌ Recibidos {len(recibidos)} de {args.mensajes}, errores: {fallidos[:3]}")
+    sys.exit(1)
+
+print("✅ Todos los emails llegaron al servidor")
@@ -0,0 +1,30 @@
+import sys
+import os
+from dotenv import load_dotenv
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+load_dotenv()
+
+from database import SesionLocal
+from services.resumen_diario import reconstruir
+
+# ========================
+# Recalcula resumen_diario desde cero a partir de turnos.
+# Se puede correr con la app andando: las reservas que llegan
+# mientras tanto esperan y se suman sobre el resumen nuevo.
+#
+#   python scripts/reconstruir_resumen.py
+# ========================
+
+db = SesionLocal()
+
+try:
+    filas = reconstruir(db)
+    db.commit()
+    print(f"✅ Resumen diario reconstruido: {filas} filas")
+
+except Exception:
+    db.rollback()
+    raise
+
+finally:
+    db.close()
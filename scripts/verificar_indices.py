@@ -0,0 +1,130 @@
+import sys
+import os
+import json
+from datetime import date
+from dotenv import load_dotenv
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+load_dotenv()
+
+from sqlalchemy import event
+
+from database import SesionLocal, engine
+from models import RolEnum, Usuario
+from routers import admin, admin_barberos
+
+# ========================
+# Verifica con EXPLAIN que las consultas de estadísticas filtran
+# por rangos que usan índices (nada de extract() sobre la fecha).
+#
+# Corre los endpoints de verdad contra la base configurada, junta
+# el SQL que mandan y lo vuelve a mandar como EXPLAIN con
+# enable_seqscan = off. Cada lectura de turnos / resumen_diario
+# tiene que tener un "Index Cond" y la fecha no puede quedar en un
+# "Filter": un Seq Scan, o un índice recorrido con la fecha filtrada
+# aparte (lo que pasa con extract()), cuenta como error.
+# No escribe nada.
+#
+#   python scripts/verificar_indices.py
+# ========================
+
+TABLAS = {"turnos", "resumen_diario"}
+
+hoy = date.today()
+mes = hoy.strftime("%Y-%m")
+
+db = SesionLocal()
+
+barbero = db.query(Usuario.id).filter(Usuario.rol == RolEnum.barbero).first()
+
+CONSULTAS = {
+    "ganancias dia": lambda: admin.ver_ganancias(tipo="dia", fecha=hoy.isoformat(), mes=None, db=db, user=None),
+    "ganancias mes": lambda: admin.ver_ganancias(tipo="mes", fecha=None, mes=mes, db=db, user=None),
+    "grafico mes": lambda: admin.ganancias_grafico(tipo="mes", fecha=None, mes=mes, db=db, user=None),
+    "detalle dia": lambda: admin.detalle_ganancias(fecha=hoy.isoformat(), servicio=None, db=db, user=None),
+    "clientes dia": lambda: admin.clientes_por_dia(fecha=hoy.isoformat(), db=db, user=None),
+    "resumen mes": lambda: admin.resumen_mes(anio=hoy.year, mes=hoy.month, db=db, user=None),
+}
+
+if barbero:
+    CONSULTAS["panel barbero"] = lambda: admin_barberos.panel_barbero_admin(
+        barbero_id=barbero.id, db=db, user=None
+    )
+else:
+    print("⚠️ No hay barberos: se saltea el panel de barbero")
+
+# ========================
+# 1️⃣ Juntar el SQL de cada endpoint
+# ========================
+capturadas = []
+
+
+def capturar(conn, cursor, statement, parameters, context, executemany):
+    if statement.lstrip().upper().startswith("SELECT"):
+        capturadas.append((statement, parameters))
+
+
+event.listen(engine, "before_cursor_execute", capturar)
+
+sentencias = {}
+for nombre, consulta in CONSULTAS.items():
+    capturadas.clear()
+    consulta()
+    sentencias[nombre] = list(capturadas)
+
+event.remove(engine, "before_cursor_execute", capturar)
+db.rollback()
+
+# ========================
+# 2️⃣ EXPLAIN sin seq scans
+# ========================
+def nodos(plan):
+    yield plan
+    for hijo in plan.get("Plans", []):
+        yield from nodos(hijo)
+
+
+errores = 0
+
+with engine.connect() as conn:
+    cursor = conn.connection.cursor()
+    cursor.execute("SET enable_seqscan = off")
+
+    for nombre, lista in sentencias.items():
+        for statement, parameters in lista:
+            cursor.execute("EXPLAIN (FORMAT JSON) " + statement, parameters)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+
+            for nodo in nodos(plan[0]["Plan"]):
+                tabla = nodo.get("Relation Name")
+                if tabla not in TABLAS:
+                    continue
+
+                tipo = nodo["Node Type"]
+
+                # Bitmap Heap Scan: el índice y la condición están en el hijo
+                indexado = [n for n in nodos(nodo) if "Index Cond" in n]
+
+                # La fecha tiene que ir en el índice, no filtrarse después
+                filtro = nodo.get("Filter", "")
+
+                if not indexado:
+                    errores += 1
+                    print(f"❌ {nombre}: {tipo} sobre {tabla} sin condición de índice")
+                    print(f"   {' '.join(statement.split())[:200]}")
+                elif "fecha" in filtro:
+                    errores += 1
+                    print(f"❌ {nombre}: la fecha se filtra fuera del índice: {filtro}")
+                else:
+                    print(f"✅ {nombre}: {tipo} sobre {tabla} ({indexado[0]['Index Name']})")
+
+    conn.rollback()
+
+db.close()
+
+if errores:
+    print(f"❌ {errores} consultas no usan índice")
+    sys.exit(1)
+
+print("✅ Todas las consultas de estadísticas usan índices")
@@ -1,7 +1,15 @@
+import logging
+import os
 from datetime import date, datetime, time, timedelta
+from sqlalchemy import func, text
 from sqlalchemy.dialects.postgresql import insert
 from models import Horario, HorarioBase, RolEnum, Usuario
 from database import SesionLocal
+from services import agenda_virtual
+from services.agenda_virtual import HORIZONTE_DIAS
+from services.disponibilidad import registrar_cambio_agenda
+
+logger = logging.getLogger(__name__)
 
 DIAS = {
     "monday": "lunes",
@@ -23,20 +31,30 @@ FRANJAS = {
 
 INTERVALO = 30
 
+# Cada corrida agrega como mucho este rango por barbero, así la
+# primera carga de un barbero nuevo no es un insert de un año entero
+DIAS_POR_CORRIDA = int(os.getenv("AGENDA_DIAS_POR_CORRIDA", "31"))
+
+LOCK_EXTENDER_AGENDA = 1991_0001
+
 def dia_espanol(fecha: date):
     return DIAS[fecha.strftime("%A").lower()]
 
 
 def generar_agenda_si_vacia():
+    """
+    Carga las reglas semanales (HorarioBase) si no existen.
+    Los horarios reales los va generando extender_agenda().
+    """
     db = SesionLocal()
 
-    # 🔎 Si ya hay horarios, no hacemos nada
-    if db.query(Horario).first():
-        print("⏭️ Agenda ya existente, no se genera nada")
+    # 🔎 Si ya hay reglas, no hacemos nada
+    if db.query(HorarioBase).first():
+        logger.info("⏭️ Agenda ya existente, no se genera nada")
         db.close()
         return
 
-    print("🚀 Generando agenda automática...")
+    logger.info("🚀 Generando agenda automática...")
 
     # 1️⃣ Horarios base
     for dia, franjas in FRANJAS.items():
@@ -57,42 +75,90 @@ def generar_agenda_si_vacia():
                 ).time()
 
     db.commit()
+    db.close()
+
+    logger.info("✅ Horarios base generados")
 
-    # 2️⃣ Horarios reales
-    hoy = date.today()
 
-    barberos = db.query(Usuario).filter(
-        Usuario.rol.in_([RolEnum.barbero, RolEnum.admin])
-    ).all()
+# =========================================================
+# HORIZONTE MÓVIL (tarea en segundo plano)
+# =========================================================
+def extender_agenda():
+    """
+    Mantiene materializados HORIZONTE_DIAS días hacia adelante,
+    insertando solo los días que faltan al final de cada barbero.
+    Un advisory lock asegura que lo haga un solo worker a la vez.
+    """
+    if agenda_virtual.ACTIVA:
+        return 0
 
-    bases = db.query(HorarioBase).all()
+    db = SesionLocal()
 
-    bases_por_dia = {}
-    for base in bases:
-        bases_por_dia.setdefault(base.dia_semana, []).append(base)
+    try:
+        # 🔒 Si otro worker lo está haciendo, salimos
+        tomado = db.execute(
+            text("SELECT pg_try_advisory_xact_lock(:clave)"),
+            {"clave": LOCK_EXTENDER_AGENDA},
+        ).scalar()
 
-    nuevos = []
+        if not tomado:
+            return 0
 
-    for barbero in barberos:
-        for i in range(365):
-            fecha = hoy + timedelta(days=i)
-            dia = dia_espanol(fecha)
+        hoy = date.today()
+        fin = hoy + timedelta(days=HORIZONTE_DIAS - 1)
 
-            for base in bases_por_dia.get(dia, []):
-                nuevos.append({
-                    "fecha": fecha,
-                    "hora": base.hora,
-                    "disponible": True,
-                    "barbero_id": barbero.id
-                })
+        barberos = db.query(Usuario.id).filter(
+            Usuario.rol.in_([RolEnum.barbero, RolEnum.admin])
+        ).all()
 
-    stmt = insert(Horario).values(nuevos)
-    stmt = stmt.on_conflict_do_nothing(
-        index_elements=["fecha", "hora", "barbero_id"]
-    )
+        bases_por_dia = {}
+        for base in db.query(HorarioBase).all():
+            bases_por_dia.setdefault(base.dia_semana, []).append(base.hora)
 
-    db.execute(stmt)
-    db.commit()
-    db.close()
+        nuevos = []
+        extendidos = []
+
+        for barbero in barberos:
+            # Índice (barbero_id, fecha, hora): es una sola lectura
+            ultima = db.query(func.max(Horario.fecha)).filter(
+                Horario.barbero_id == barbero.id
+            ).scalar()
+
+            desde = max(ultima + timedelta(days=1), hoy) if ultima else hoy
+            hasta = min(fin, desde + timedelta(days=DIAS_POR_CORRIDA - 1))
 
-    print("✅ Agenda generada automáticamente")
\ No newline at end of file
+            fecha = desde
+            cantidad = len(nuevos)
+
+            while fecha <= hasta:
+                for hora in bases_por_dia.get(dia_espanol(fecha), []):
+                    nuevos.append({
+                        "fecha": fecha,
+                        "hora": hora,
+                        "disponible": True,
+                        "barbero_id": barbero.id
+                    })
+                fecha += timedelta(days=1)
+
+            if len(nuevos) > cantidad:
+                extendidos.append(barbero.id)
+
+        if nuevos:
+            stmt = insert(Horario).values(nuevos)
+            stmt = stmt.on_conflict_do_nothing(
+                index_elements=["fecha", "hora", "barbero_id"]
+            )
+            db.execute(stmt)
+
+        for barbero_id in extendidos:
+            registrar_cambio_agenda(db, barbero_id)
+
+        db.commit()
+
+        if nuevos:
+            logger.info("📅 Agenda extendida", extra={"horarios_nuevos": len(nuevos)})
+
+        return len(nuevos)
+
+    finally:
+        db.close()
@@ -0,0 +1,198 @@
+import os
+from datetime import date, time, timedelta
+from typing import NamedTuple
+
+from fastapi import HTTPException
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from models import ExcepcionAgenda, Horario, HorarioBase, RolEnum, Usuario
+from utils.horarios import dia_espanol
+
+# =========================================================
+# MODO AGENDA VIRTUAL
+# =========================================================
+# Los horarios se calculan desde las reglas semanales (HorarioBase)
+# y solo se guarda una fila en `horarios` cuando se reserva o bloquea.
+ACTIVA = os.getenv("AGENDA_VIRTUAL", "false").lower() in ("1", "true", "si")
+
+HORIZONTE_DIAS = int(os.getenv("HORIZONTE_DIAS", "365"))
+
+
+class Slot(NamedTuple):
+    barbero_id: int
+    fecha: date
+    hora: time
+    id: int | None  # None = todavía no materializado
+    disponible: bool
+
+
+def horas_por_dia(db: Session) -> dict[str, list[time]]:
+    reglas = {}
+    for dia, hora in db.query(HorarioBase.dia_semana, HorarioBase.hora).all():
+        reglas.setdefault(dia, []).append(hora)
+    return reglas
+
+
+def _bloqueado(rangos, hora: time) -> bool:
+    for desde, hasta in rangos:
+        if desde is None or (desde <= hora <= (hasta or desde)):
+            return True
+    return False
+
+
+def slots(
+    db: Session,
+    barbero_ids: list[int],
+    desde: date,
+    hasta: date | None = None,
+) -> list[Slot]:
+    """
+    Horarios de los barberos en [desde, hasta], ordenados por
+    fecha, hora y barbero. Combina reglas, filas materializadas
+    y excepciones con tres queries, sin importar el rango.
+    """
+    limite = date.today() + timedelta(days=HORIZONTE_DIAS - 1)
+    hasta = min(hasta, limite) if hasta else limite
+
+    if not barbero_ids or hasta < desde:
+        return []
+
+    reglas = horas_por_dia(db)
+
+    materializados = {}
+    filas = db.query(
+        Horario.barbero_id, Horario.fecha, Horario.hora,
+        Horario.id, Horario.disponible,
+    ).filter(
+        Horario.barbero_id.in_(barbero_ids),
+        Horario.fecha >= desde,
+        Horario.fecha <= hasta,
+    )
+    for f in filas:
+        materializados.setdefault((f.barbero_id, f.fecha), {})[f.hora] = f
+
+    excepciones = {}
+    bloqueos = db.query(
+        ExcepcionAgenda.barbero_id, ExcepcionAgenda.fecha,
+        ExcepcionAgenda.hora_desde, ExcepcionAgenda.hora_hasta,
+    ).filter(
+        ExcepcionAgenda.barbero_id.in_(barbero_ids),
+        ExcepcionAgenda.fecha >= desde,
+        ExcepcionAgenda.fecha <= hasta,
+    )
+    for e in bloqueos:
+        excepciones.setdefault((e.barbero_id, e.fecha), []).append(
+            (e.hora_desde, e.hora_hasta)
+        )
+
+    resultado = []
+    fecha = desde
+
+    while fecha <= hasta:
+        horas_regla = reglas.get(dia_espanol(fecha), [])
+
+        for barbero_id in barbero_ids:
+            filas_dia = materializados.get((barbero_id, fecha), {})
+            rangos = excepciones.get((barbero_id, fecha), [])
+
+            for hora in sorted(set(horas_regla) | set(filas_dia)):
+                fila = filas_dia.get(hora)
+                disponible = fila.disponible if fila else True
+
+                if disponible and rangos and _bloqueado(rangos, hora):
+                    disponible = False
+
+                resultado.append(Slot(
+                    barbero_id=barbero_id,
+                    fecha=fecha,
+                    hora=hora,
+                    id=fila.id if fila else None,
+                    disponible=disponible,
+                ))
+
+        fecha += timedelta(days=1)
+
+    if len(barbero_ids) > 1:
+        resultado.sort(key=lambda s: (s.fecha, s.hora, s.barbero_id))
+
+    return resultado
+
+
+def bloqueado(db: Session, barbero_id: int, fecha: date, hora: time) -> bool:
+    """
+    True si una excepción cubre ese horario. Sin agenda virtual
+    las excepciones no aplican.
+    """
+    if not ACTIVA:
+        return False
+
+    rangos = db.query(
+        ExcepcionAgenda.hora_desde, ExcepcionAgenda.hora_hasta
+    ).filter(
+        ExcepcionAgenda.barbero_id == barbero_id,
+        ExcepcionAgenda.fecha == fecha,
+    ).all()
+
+    return _bloqueado(rangos, hora)
+
+
+def validar_profesional(db: Session, barbero_id: int):
+    """
+    404 si el id no es de un barbero o admin (los únicos con agenda).
+    """
+    existe = db.query(Usuario.id).filter(
+        Usuario.id == barbero_id,
+        Usuario.rol.in_([RolEnum.barbero, RolEnum.admin]),
+    ).first()
+
+    if not existe:
+        raise HTTPException(status_code=404, detail="Profesional no encontrado")
+
+
+def validar_horizonte(fecha: date):
+    """
+    400 fuera de [hoy, hoy + HORIZONTE_DIAS): lo mismo que muestra slots().
+    """
+    hoy = date.today()
+
+    if not hoy <= fecha < hoy + timedelta(days=HORIZONTE_DIAS):
+        raise HTTPException(status_code=400, detail="Fecha fuera de la agenda")
+
+
+def obtener_horario(db: Session, barbero_id: int, fecha: date, hora: time):
+    """
+    Devuelve el Horario de ese barbero/fecha/hora. En modo virtual lo
+    materializa si la regla semanal lo permite y no está bloqueado.
+    """
+    def buscar():
+        return db.query(Horario).filter(
+            Horario.barbero_id == barbero_id,
+            Horario.fecha == fecha,
+            Horario.hora == hora,
+        ).first()
+
+    if not ACTIVA:
+        return buscar()
+
+    if bloqueado(db, barbero_id, fecha, hora):
+        return None
+
+    horario = buscar()
+    if horario:
+        return horario
+
+    # Solo se materializa para profesionales y dentro del horizonte
+    validar_profesional(db, barbero_id)
+    validar_horizonte(fecha)
+
+    horas = horas_por_dia(db).get(dia_espanol(fecha), [])
+    if hora not in horas:
+        return None
+
+    stmt = insert(Horario).values(
+        fecha=fecha, hora=hora, disponible=True, barbero_id=barbero_id
+    ).on_conflict_do_nothing(index_elements=["fecha", "hora", "barbero_id"])
+    db.execute(stmt)
+
+    return buscar()
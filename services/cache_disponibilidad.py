@@ -0,0 +1,78 @@
+import os
+import threading
+from collections import OrderedDict
+
+CAPACIDAD = int(os.getenv("CACHE_DISPONIBILIDAD_MAX", "512"))
+
+
+class CacheLRU:
+    """
+    Cache en memoria del proceso, acotada por cantidad de entradas.
+
+    Las claves se agrupan por barbero para poder invalidar
+    exactamente lo que cambió.
+    """
+
+    def __init__(self, capacidad: int):
+        self.capacidad = capacidad
+        self._datos = OrderedDict()
+        self._por_barbero = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidaciones = 0
+
+    def obtener(self, clave):
+        with self._lock:
+            if clave not in self._datos:
+                self.misses += 1
+                return None
+
+            self._datos.move_to_end(clave)
+            self.hits += 1
+            return self._datos[clave][1]
+
+    def guardar(self, barbero_id: int, clave, valor):
+        with self._lock:
+            self._datos[clave] = (barbero_id, valor)
+            self._datos.move_to_end(clave)
+            self._por_barbero.setdefault(barbero_id, set()).add(clave)
+
+            while len(self._datos) > self.capacidad:
+                vieja, (barbero_viejo, _) = self._datos.popitem(last=False)
+                self._descartar_indice(barbero_viejo, vieja)
+                self.evictions += 1
+
+    def invalidar_barbero(self, barbero_id: int):
+        with self._lock:
+            for clave in self._por_barbero.pop(barbero_id, set()):
+                self._datos.pop(clave, None)
+                self.invalidaciones += 1
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+            self._por_barbero.clear()
+
+    def metricas(self) -> dict:
+        with self._lock:
+            return {
+                "entradas": len(self._datos),
+                "capacidad": self.capacidad,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidaciones": self.invalidaciones,
+            }
+
+    def _descartar_indice(self, barbero_id: int, clave):
+        claves = self._por_barbero.get(barbero_id)
+        if claves is not None:
+            claves.discard(clave)
+            if not claves:
+                del self._por_barbero[barbero_id]
+
+
+cache_calendario = CacheLRU(CAPACIDAD)
@@ -0,0 +1,263 @@
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import Session
+
+from models import Horario
+from services import agenda_virtual
+from services.reservas import buscar_bloques
+from utils.paginacion import despues_de, paginar, paginar_lista
+
+
+def compactar_disponibilidad(filas):
+    """
+    Arma la vista compacta del calendario a partir de filas
+    (fecha, hora, disponible) ordenadas por fecha y hora.
+
+    Cada día referencia una grilla (lista de horas del día) y un
+    bitset en hexadecimal donde el bit i indica si la hora i de la
+    grilla está libre. Las grillas se comparten entre días iguales.
+    """
+    grillas = []
+    indice_grillas = {}
+    dias = []
+
+    fecha_actual = None
+    horas = []
+    libres = 0
+
+    def cerrar_dia():
+        if fecha_actual is None or not libres:
+            return
+
+        clave = tuple(horas)
+        if clave not in indice_grillas:
+            indice_grillas[clave] = len(grillas)
+            grillas.append([h.strftime("%H:%M") for h in clave])
+
+        dias.append({
+            "fecha": fecha_actual.isoformat(),
+            "grilla": indice_grillas[clave],
+            "libres": format(libres, "x"),
+        })
+
+    for fecha, hora, disponible in filas:
+        if fecha != fecha_actual:
+            cerrar_dia()
+            fecha_actual = fecha
+            horas = []
+            libres = 0
+
+        if disponible:
+            libres |= 1 << len(horas)
+        horas.append(hora)
+
+    cerrar_dia()
+
+    return {
+        "grillas": grillas,
+        "dias": dias,
+    }
+
+
+
+def consultar_calendario(
+    db: Session,
+    barbero_id: int,
+    formato: str,
+    desde: date | None,
+    hasta: date | None,
+    cursor: str | None,
+    limite: int | None,
+):
+    """
+    Devuelve (cuerpo, siguiente_cursor) del calendario público
+    de un barbero. No valida que el barbero exista.
+    """
+    # 📅 Ventana: nunca antes de hoy
+    hoy = date.today()
+    desde = max(desde, hoy) if desde else hoy
+
+    filtros = [
+        Horario.barbero_id == barbero_id,
+        Horario.fecha >= desde,
+        func.extract("dow", Horario.fecha) != 0,  # ❌ sin domingos
+    ]
+
+    if agenda_virtual.ACTIVA:
+        return _consultar_calendario_virtual(
+            db, barbero_id, formato, desde, hasta, cursor, limite
+        )
+
+    if hasta:
+        filtros.append(Horario.fecha <= hasta)
+
+    # 📦 Formato compacto: un registro por día con grilla + bitset
+    if formato == "compacto":
+        filas = (
+            db.query(Horario.fecha, Horario.hora, Horario.disponible)
+            .filter(*filtros)
+            .order_by(Horario.fecha, Horario.hora)
+            .all()
+        )
+
+        return compactar_disponibilidad(filas), None
+
+    query = (
+        db.query(Horario.id, Horario.fecha, Horario.hora)
+        .filter(*filtros, Horario.disponible == True)
+    )
+
+    if cursor:
+        query = query.filter(
+            despues_de(cursor, Horario.fecha, Horario.hora, Horario.id)
+        )
+
+    horarios, siguiente = paginar(
+        query.order_by(Horario.fecha, Horario.hora, Horario.id),
+        limite,
+        Horario.fecha, Horario.hora, Horario.id,
+    )
+
+    # ⚠️ No devolver 404 si no hay horarios
+    # Simplemente devolver lista vacía
+    return _serializar_libres(horarios), siguiente
+
+
+def _consultar_calendario_virtual(
+    db, barbero_id, formato, desde, hasta, cursor, limite
+):
+    filas = agenda_virtual.slots(db, [barbero_id], desde, hasta)
+
+    if formato == "compacto":
+        return compactar_disponibilidad(
+            (f.fecha, f.hora, f.disponible) for f in filas
+        ), None
+
+    libres, siguiente = paginar_lista(
+        [f for f in filas if f.disponible], cursor, limite
+    )
+
+    return _serializar_libres(libres), siguiente
+
+
+def _serializar_libres(horarios):
+    # En agenda virtual `id` es None hasta que se reserva:
+    # el cliente reserva con barbero_id + fecha + hora
+    return [
+        {
+            "id": h.id,
+            "fecha": h.fecha.isoformat(),
+            "hora": h.hora.strftime("%H:%M"),
+            "disponible": True,
+        }
+        for h in horarios
+    ]
+
+
+# =========================================================
+# PRÓXIMO TURNO LIBRE
+# =========================================================
+def _cumple_filtros(s, ahora, dias_semana, hora_desde, hora_hasta) -> bool:
+    if (s.fecha, s.hora) <= (ahora.date(), ahora.time()):
+        return False
+    if dias_semana and s.fecha.weekday() not in dias_semana:
+        return False
+    if hora_desde and s.hora < hora_desde:
+        return False
+    if hora_hasta and s.hora > hora_hasta:
+        return False
+    return True
+
+
+def buscar_proximo_libre(
+    db: Session,
+    barbero_ids: list[int],
+    ahora: datetime,
+    dias_semana: list[int] | None = None,
+    hora_desde: time | None = None,
+    hora_hasta: time | None = None,
+    servicio=None,
+):
+    """
+    Primer horario libre posterior a `ahora` que cumpla los filtros.
+    `dias_semana` usa la convención de date.weekday() (0 = lunes).
+    Con `servicio`, el horario tiene que tener libres también los
+    siguientes que ocupa su duración.
+    """
+    if agenda_virtual.ACTIVA:
+        return _buscar_proximo_libre_virtual(
+            db, barbero_ids, ahora, dias_semana, hora_desde, hora_hasta, servicio
+        )
+
+    # Las columnas salen todas de ix_horario_libre_fecha_hora
+    query = db.query(
+        Horario.id, Horario.barbero_id, Horario.fecha, Horario.hora
+    ).filter(
+        Horario.disponible == True,
+        tuple_(Horario.fecha, Horario.hora) > tuple_(ahora.date(), ahora.time()),
+        Horario.barbero_id.in_(barbero_ids),
+    )
+
+    if dias_semana:
+        query = query.filter(
+            (func.extract("isodow", Horario.fecha) - 1).in_(dias_semana)
+        )
+
+    if hora_desde:
+        query = query.filter(Horario.hora >= hora_desde)
+
+    if hora_hasta:
+        query = query.filter(Horario.hora <= hora_hasta)
+
+    query = query.order_by(Horario.fecha, Horario.hora)
+
+    if servicio is None or not servicio.duracion:
+        return query.first()
+
+    # Servicio de varios horarios: se revisa día por día, a partir
+    # del próximo día con algún horario candidato
+    candidato = query.first()
+
+    while candidato:
+        dia = (
+            db.query(
+                Horario.barbero_id, Horario.fecha, Horario.hora,
+                Horario.id, Horario.disponible,
+            )
+            .filter(
+                Horario.barbero_id.in_(barbero_ids),
+                Horario.fecha == candidato.fecha,
+            )
+            .all()
+        )
+
+        for bloque in buscar_bloques(dia, servicio):
+            if _cumple_filtros(bloque[0], ahora, dias_semana, hora_desde, hora_hasta):
+                return bloque[0]
+
+        candidato = query.filter(Horario.fecha > candidato.fecha).first()
+
+    return None
+
+
+def _buscar_proximo_libre_virtual(
+    db, barbero_ids, ahora, dias_semana, hora_desde, hora_hasta, servicio
+):
+    # Se recorre el horizonte por ventanas para no armar un año entero
+    limite = date.today() + timedelta(days=agenda_virtual.HORIZONTE_DIAS - 1)
+    desde = ahora.date()
+
+    while desde <= limite:
+        hasta = desde + timedelta(days=13)
+
+        # Ventanas de días enteros: los bloques no quedan cortados
+        slots = agenda_virtual.slots(db, barbero_ids, desde, hasta)
+
+        for bloque in buscar_bloques(slots, servicio):
+            if _cumple_filtros(bloque[0], ahora, dias_semana, hora_desde, hora_hasta):
+                return bloque[0]
+
+        desde = hasta + timedelta(days=1)
+
+    return None
@@ -0,0 +1,264 @@
+import json
+import logging
+import os
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from database import SesionLocal
+from models import EmailPendiente
+
+logger = logging.getLogger(__name__)
+
+# =========================================================
+# OUTBOX DE EMAILS
+# =========================================================
+# Los endpoints solo encolan (INSERT en la misma transacción del
+# turno). Un worker en segundo plano los manda por lotes, con
+# reintentos y backoff, así la reserva no espera al proveedor.
+MAX_INTENTOS = int(os.getenv("EMAIL_MAX_INTENTOS", "6"))
+LOTE = int(os.getenv("EMAIL_LOTE", "500"))
+
+BACKOFF_BASE_SEG = 30
+BACKOFF_MAX_SEG = 3600
+
+REMITENTE = "Turnos <no-reply@farixio.com>"
+
+
+class Mensaje(NamedTuple):
+    destino: str
+    asunto: str
+    html: str
+
+
+def encolar(db: Session, destino: str, asunto: str, html: str):
+    """
+    Agrega el email al outbox. Sale solo si la transacción
+    del llamador hace commit.
+    """
+    db.add(EmailPendiente(destino=destino, asunto=asunto, html=html))
+
+
+# =========================================================
+# TRANSPORTES
+# =========================================================
+class Transporte(ABC):
+    """
+    enviar_lote devuelve un error (o None si salió) por mensaje.
+    Por defecto manda de a uno; los transportes con API de lotes
+    lo redefinen. Si no está configurado, el worker no toca la cola.
+    """
+
+    configurado = True
+
+    @abstractmethod
+    def enviar(self, mensaje: Mensaje):
+        ...
+
+    def enviar_lote(self, mensajes: list[Mensaje]) -> list[str | None]:
+        errores = []
+        for mensaje in mensajes:
+            try:
+                self.enviar(mensaje)
+                errores.append(None)
+            except Exception as e:
+                errores.append(str(e))
+        return errores
+
+
+class TransporteResend(Transporte):
+    """
+    API HTTP de Resend con un cliente httpx compartido (keep-alive).
+    Los lotes van a /emails/batch de a RESEND_MAX_LOTE mensajes,
+    con como mucho EMAIL_CONCURRENCIA requests en paralelo.
+    """
+
+    MAX_LOTE = int(os.getenv("RESEND_MAX_LOTE", "100"))
+    CONCURRENCIA = int(os.getenv("EMAIL_CONCURRENCIA", "4"))
+
+    def __init__(self, url: str | None = None, api_key: str | None = None):
+        import httpx
+
+        self.url = (url or os.getenv("RESEND_API_URL", "https://api.resend.com")).rstrip("/")
+        self.api_key = api_key or os.getenv("RESEND_API_KEY")
+
+        self.cliente = httpx.Client(
+            base_url=self.url,
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            timeout=httpx.Timeout(10.0),
+            limits=httpx.Limits(
+                max_connections=self.CONCURRENCIA,
+                max_keepalive_connections=self.CONCURRENCIA,
+            ),
+        )
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.CONCURRENCIA,
+            thread_name_prefix="email",
+        )
+
+    @property
+    def configurado(self) -> bool:
+        return bool(self.api_key)
+
+    @staticmethod
+    def _cuerpo(mensaje: Mensaje) -> dict:
+        return {
+            "from": REMITENTE,
+            "to": [mensaje.destino],
+            "reply_to": mensaje.destino,
+            "subject": mensaje.asunto,
+            "html": mensaje.html,
+        }
+
+    def enviar(self, mensaje: Mensaje):
+        if not self.api_key:
+            raise RuntimeError("RESEND_API_KEY no configurada")
+
+        self.cliente.post("/emails", json=self._cuerpo(mensaje)).raise_for_status()
+
+    def _enviar_tanda(self, tanda: list[Mensaje]) -> list[str | None]:
+        # Resend acepta o rechaza la tanda entera
+        try:
+            self.cliente.post(
+                "/emails/batch",
+                json=[self._cuerpo(m) for m in tanda],
+            ).raise_for_status()
+            return [None] * len(tanda)
+        except Exception as e:
+            return [str(e)] * len(tanda)
+
+    def enviar_lote(self, mensajes: list[Mensaje]) -> list[str | None]:
+        if not self.api_key:
+            return ["RESEND_API_KEY no configurada"] * len(mensajes)
+
+        tandas = [
+            mensajes[i:i + self.MAX_LOTE]
+            for i in range(0, len(mensajes), self.MAX_LOTE)
+        ]
+
+        if len(tandas) == 1:
+            return self._enviar_tanda(tandas[0])
+
+        resultados = self._pool.map(self._enviar_tanda, tandas)
+
+        return [error for tanda in resultados for error in tanda]
+
+
+class TransporteArchivo(Transporte):
+    """
+    Escribe cada email como una línea JSON (desarrollo).
+    """
+
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+
+    def enviar(self, mensaje: Mensaje):
+        linea = json.dumps(mensaje._asdict(), ensure_ascii=False)
+        with self._lock, open(self.ruta, "a", encoding="utf-8") as f:
+            f.write(linea + "\n")
+
+
+class TransporteMemoria(Transporte):
+    """
+    Guarda los emails en una lista (pruebas).
+    """
+
+    def __init__(self):
+        self.enviados = []
+
+    def enviar(self, mensaje: Mensaje):
+        self.enviados.append(mensaje)
+
+
+def _crear_transporte():
+    tipo = os.getenv("EMAIL_TRANSPORTE", "resend")
+
+    if tipo == "archivo":
+        return TransporteArchivo(os.getenv("EMAIL_ARCHIVO", "emails.jsonl"))
+    if tipo == "memoria":
+        return TransporteMemoria()
+    return TransporteResend()
+
+
+transporte = _crear_transporte()
+
+if not transporte.configurado:
+    logger.warning("⚠️ Email desactivado: RESEND_API_KEY no configurada, los emails quedan en cola")
+
+
+# =========================================================
+# WORKER (tarea periódica)
+# =========================================================
+def _backoff(intentos: int) -> timedelta:
+    return timedelta(seconds=min(BACKOFF_MAX_SEG, BACKOFF_BASE_SEG * 2 ** (intentos - 1)))
+
+
+def despachar_pendientes() -> int:
+    """
+    Manda los emails vencidos por lotes. FOR UPDATE SKIP LOCKED
+    reparte el trabajo entre workers sin mandar dos veces el mismo.
+    """
+    # Sin credenciales los emails quedan pendientes, sin gastar intentos
+    if not transporte.configurado:
+        return 0
+
+    enviados = 0
+    db = SesionLocal()
+
+    try:
+        while True:
+            lote = (
+                db.query(EmailPendiente)
+                .filter(
+                    EmailPendiente.enviado_en == None,
+                    EmailPendiente.proximo_intento <= func.now(),
+                    EmailPendiente.intentos < MAX_INTENTOS,
+                )
+                .order_by(EmailPendiente.proximo_intento)
+                .limit(LOTE)
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+
+            if not lote:
+                break
+
+            ahora = datetime.now(timezone.utc)
+
+            errores = transporte.enviar_lote([
+                Mensaje(email.destino, email.asunto, email.html)
+                for email in lote
+            ])
+
+            for email, error in zip(lote, errores):
+                if error is None:
+                    email.enviado_en = ahora
+                    enviados += 1
+                    continue
+
+                email.intentos += 1
+                email.ultimo_error = error[:500]
+                email.proximo_intento = ahora + _backoff(email.intentos)
+                logger.warning(
+                    "❌ Error enviando email",
+                    extra={"email_id": email.id, "intento": email.intentos, "detalle": error},
+                )
+
+            db.commit()
+
+            if len(lote) < LOTE:
+                break
+
+        if enviados:
+            logger.info("📧 Emails enviados", extra={"cantidad": enviados})
+
+        return enviados
+
+    finally:
+        db.close()
@@ -0,0 +1,130 @@
+import hashlib
+
+from fastapi import Request, Response
+from sqlalchemy import event, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from database import SesionLocal
+from models import VersionDisponibilidad
+from services import eventos
+from services.cache_disponibilidad import cache_calendario
+
+CLAVE_PROFESIONALES = "profesionales"
+
+
+def clave_barbero(barbero_id: int) -> str:
+    return f"barbero:{barbero_id}"
+
+
+# =========================================================
+# VERSIONES (se incrementan en la misma transacción del cambio)
+# =========================================================
+def incrementar_version(db: Session, clave: str):
+    stmt = insert(VersionDisponibilidad).values(clave=clave, version=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["clave"],
+        set_={"version": VersionDisponibilidad.version + 1},
+    )
+    db.execute(stmt)
+
+
+def obtener_version(db: Session, clave: str) -> int:
+    version = (
+        db.query(VersionDisponibilidad.version)
+        .filter(VersionDisponibilidad.clave == clave)
+        .scalar()
+    )
+    return version or 0
+
+
+def obtener_version_global(db: Session) -> str:
+    """
+    Resume todas las versiones en un valor que cambia con
+    cualquier cambio de cualquier barbero.
+    """
+    total, claves = db.query(
+        func.coalesce(func.sum(VersionDisponibilidad.version), 0),
+        func.count(VersionDisponibilidad.clave),
+    ).one()
+    return f"{total}-{claves}"
+
+
+def registrar_cambio_horario(db: Session, horario):
+    """
+    Llamar cada vez que cambia `disponible` de un horario,
+    antes del commit.
+    """
+    _marcar_barbero(db, horario.barbero_id)
+
+    eventos.emitir(db, {
+        "tipo": "slot-liberado" if horario.disponible else "slot-tomado",
+        "barbero_id": horario.barbero_id,
+        "horario_id": horario.id,
+        "fecha": horario.fecha.isoformat(),
+        "hora": horario.hora.strftime("%H:%M"),
+    })
+
+
+def registrar_cambio_agenda(db: Session, barbero_id: int):
+    """
+    Llamar cuando se crean o borran horarios de un barbero en bloque.
+    """
+    _marcar_barbero(db, barbero_id)
+
+    eventos.emitir(db, {
+        "tipo": "agenda-actualizada",
+        "barbero_id": barbero_id,
+    })
+
+
+def _marcar_barbero(db: Session, barbero_id: int):
+    incrementar_version(db, clave_barbero(barbero_id))
+    db.info.setdefault("barberos_modificados", set()).add(barbero_id)
+
+
+def registrar_cambio_profesionales(db: Session):
+    incrementar_version(db, CLAVE_PROFESIONALES)
+
+
+# =========================================================
+# INVALIDACIÓN DE CACHE Y EVENTOS (solo si el commit salió bien)
+# =========================================================
+@event.listens_for(SesionLocal, "after_commit")
+def _invalidar_cache(db: Session):
+    for barbero_id in db.info.pop("barberos_modificados", set()):
+        cache_calendario.invalidar_barbero(barbero_id)
+
+    eventos.publicar_pendientes(db)
+
+
+@event.listens_for(SesionLocal, "after_rollback")
+def _descartar_cambios(db: Session):
+    db.info.pop("barberos_modificados", None)
+    eventos.descartar_pendientes(db)
+
+
+# =========================================================
+# ETAG / 304
+# =========================================================
+def calcular_etag(*partes) -> str:
+    crudo = "|".join(str(p) for p in partes)
+    return f'W/"{hashlib.sha1(crudo.encode()).hexdigest()[:16]}"'
+
+
+def respuesta_no_modificada(request: Request, response: Response, etag: str):
+    """
+    Setea el ETag en la respuesta. Si el cliente ya lo tiene,
+    devuelve una respuesta 304 para cortar el handler ahí.
+    """
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+
+    enviados = request.headers.get("if-none-match", "")
+    if etag in [e.strip() for e in enviados.split(",")]:
+        return Response(
+            status_code=304,
+            headers={"ETag": etag, "Cache-Control": "no-cache"},
+        )
+
+    return None
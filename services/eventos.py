@@ -0,0 +1,176 @@
+import asyncio
+import json
+import logging
+import os
+import select
+import threading
+import time
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from database import engine
+
+logger = logging.getLogger(__name__)
+
+CANAL = "disponibilidad"
+
+# "postgres": LISTEN/NOTIFY (sirve con varios workers)
+# "local": solo dentro del proceso (desarrollo / sqlite)
+MODO = os.getenv(
+    "EVENTOS_BUS",
+    "postgres" if engine.dialect.name == "postgresql" else "local",
+)
+
+MAX_COLA = 100
+
+
+# =========================================================
+# BUS EN MEMORIA (fan-out a los clientes SSE del proceso)
+# =========================================================
+class BusEventos:
+
+    def __init__(self):
+        self._suscriptores = {}
+        self._lock = threading.Lock()
+
+    def suscribir(self, barbero_id: int) -> asyncio.Queue:
+        cola = asyncio.Queue(maxsize=MAX_COLA)
+        loop = asyncio.get_running_loop()
+
+        with self._lock:
+            self._suscriptores.setdefault(barbero_id, set()).add((loop, cola))
+
+        return cola
+
+    def desuscribir(self, barbero_id: int, cola: asyncio.Queue):
+        with self._lock:
+            suscriptores = self._suscriptores.get(barbero_id, set())
+            suscriptores.difference_update(
+                {s for s in suscriptores if s[1] is cola}
+            )
+            if not suscriptores:
+                self._suscriptores.pop(barbero_id, None)
+
+    def publicar(self, evento: dict):
+        """
+        Se puede llamar desde cualquier hilo.
+        """
+        with self._lock:
+            destinos = list(self._suscriptores.get(evento["barbero_id"], ()))
+
+        for loop, cola in destinos:
+            loop.call_soon_threadsafe(_encolar, cola, evento)
+
+    def cantidad_suscriptores(self) -> int:
+        with self._lock:
+            return sum(len(s) for s in self._suscriptores.values())
+
+
+def _encolar(cola: asyncio.Queue, evento: dict):
+    # Cliente lento: se descarta el evento, el cliente puede
+    # recargar el calendario con el próximo "agenda-actualizada"
+    if not cola.full():
+        cola.put_nowait(evento)
+
+
+bus = BusEventos()
+
+
+# =========================================================
+# AVISOS ENTRE WORKERS (no van a los clientes SSE)
+# =========================================================
+# Eventos con un `tipo` registrado acá se entregan a la función
+# en cada worker (p. ej. invalidar un cache local).
+_manejadores = {}
+
+
+def al_recibir(tipo: str, funcion):
+    _manejadores[tipo] = funcion
+
+
+def _despachar(evento: dict):
+    manejador = _manejadores.get(evento.get("tipo"))
+
+    if manejador is None:
+        bus.publicar(evento)
+        return
+
+    try:
+        manejador(evento)
+    except Exception:
+        logger.exception("❌ Error procesando evento %s", evento.get("tipo"))
+
+
+# =========================================================
+# EMISIÓN (dentro de la transacción del cambio)
+# =========================================================
+def emitir(db: Session, evento: dict):
+    """
+    En modo postgres el NOTIFY viaja con la transacción: solo se
+    entrega si el commit sale bien. En modo local se publica en el
+    after_commit de la sesión.
+    """
+    if MODO == "postgres":
+        db.execute(
+            text("SELECT pg_notify(:canal, :payload)"),
+            {"canal": CANAL, "payload": json.dumps(evento)},
+        )
+    else:
+        db.info.setdefault("eventos_pendientes", []).append(evento)
+
+
+def publicar_pendientes(db: Session):
+    for evento in db.info.pop("eventos_pendientes", []):
+        _despachar(evento)
+
+
+def descartar_pendientes(db: Session):
+    db.info.pop("eventos_pendientes", None)
+
+
+# =========================================================
+# LISTEN (un hilo por worker)
+# =========================================================
+def _escuchar():
+    while True:
+        conexion = None
+        try:
+            conexion = engine.raw_connection()
+            crudo = conexion.driver_connection
+            conexion.detach()
+
+            crudo.autocommit = True
+            crudo.cursor().execute(f"LISTEN {CANAL}")
+            logger.info("📡 Escuchando eventos de disponibilidad")
+
+            while True:
+                if select.select([crudo], [], [], 30) == ([], [], []):
+                    continue
+
+                crudo.poll()
+                while crudo.notifies:
+                    aviso = crudo.notifies.pop(0)
+                    _despachar(json.loads(aviso.payload))
+
+        except Exception as e:
+            logger.exception("❌ Error escuchando eventos: %s", e)
+            time.sleep(5)
+
+        finally:
+            if conexion is not None:
+                try:
+                    conexion.close()
+                except Exception:
+                    pass
+
+
+def iniciar_escucha():
+    if MODO != "postgres":
+        return
+
+    threading.Thread(
+        target=_escuchar,
+        name="escucha-disponibilidad",
+        daemon=True,
+    ).start()
@@ -0,0 +1,34 @@
+from sqlalchemy import case, literal
+
+from models import RolEnum
+
+# =========================================================
+# REPARTO DE GANANCIAS
+# =========================================================
+# Turno de un barbero: 40% para el local (alquiler), 60% para él.
+# Turno del admin (o de un barbero con rol admin): todo del admin.
+PORCENTAJE_ADMIN = 0.40
+PORCENTAJE_BARBERO = 0.60
+
+
+def reparto(rol_col, precio_col):
+    """
+    Columnas SQL (admin_propia, admin_alquiler, barbero) para cada
+    turno, según el rol del barbero unido (NULL = sin barbero).
+    """
+    es_admin = rol_col == RolEnum.admin
+
+    return (
+        case((es_admin, precio_col), else_=literal(0.0)).label("admin_propia"),
+        case((es_admin, literal(0.0)), else_=precio_col * PORCENTAJE_ADMIN).label("admin_alquiler"),
+        case((es_admin, literal(0.0)), else_=precio_col * PORCENTAJE_BARBERO).label("barbero"),
+    )
+
+
+def repartir(precio: float, es_admin: bool) -> tuple[float, float, float]:
+    """
+    Lo mismo que reparto() para un solo turno, en Python.
+    """
+    if es_admin:
+        return precio, 0.0, 0.0
+    return 0.0, precio * PORCENTAJE_ADMIN, precio * PORCENTAJE_BARBERO
@@ -0,0 +1,125 @@
+import hashlib
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+
+from fastapi import HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import delete, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from database import SesionLocal
+from models import RespuestaIdempotente
+
+logger = logging.getLogger(__name__)
+
+# =========================================================
+# IDEMPOTENCY-KEY
+# =========================================================
+# Un reintento con la misma clave devuelve la respuesta guardada
+# sin volver a tocar horarios ni turnos (ni mandar otro email).
+TTL_HORAS = int(os.getenv("IDEMPOTENCIA_TTL_HORAS", "24"))
+
+PURGA_POR_CORRIDA = 5000
+
+
+def calcular_clave(authorization: str | None, idempotency_key: str, request: Request) -> str:
+    """
+    La clave incluye el token: dos usuarios con la misma
+    Idempotency-Key no comparten respuesta.
+    """
+    partes = [
+        authorization or "",
+        idempotency_key,
+        request.method,
+        request.url.path,
+    ]
+    return hashlib.sha256("\n".join(partes).encode()).hexdigest()
+
+
+def reclamar(db: Session, clave: str | None) -> JSONResponse | None:
+    """
+    Llamar al principio del handler, antes de cualquier cambio.
+
+    Si la clave es nueva la deja registrada en la transacción actual
+    y devuelve None: el handler sigue normalmente y tiene que llamar
+    a guardar() antes del commit. Si falla y hace rollback, la clave
+    desaparece y el reintento se procesa de nuevo.
+
+    Si ya hay una respuesta guardada, la devuelve. Un reintento que
+    llega mientras el original sigue en curso queda esperando el
+    lock de la fila en Postgres y después ve la respuesta.
+    """
+    if not clave:
+        return None
+
+    expira = datetime.now(timezone.utc) + timedelta(hours=TTL_HORAS)
+
+    stmt = insert(RespuestaIdempotente).values(clave=clave, expira=expira)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["clave"],
+        set_={"status_code": None, "cuerpo": None, "expira": expira},
+        where=RespuestaIdempotente.expira < func.now(),
+    ).returning(RespuestaIdempotente.clave)
+
+    if db.execute(stmt).scalar() is not None:
+        return None
+
+    guardada = db.get(RespuestaIdempotente, clave)
+
+    if guardada is None or guardada.status_code is None:
+        raise HTTPException(
+            status_code=409,
+            detail="Hay una solicitud con esta Idempotency-Key en curso"
+        )
+
+    return JSONResponse(
+        status_code=guardada.status_code,
+        content=guardada.cuerpo,
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+def guardar(db: Session, clave: str | None, cuerpo, status_code: int = 200):
+    """
+    Guarda la respuesta en la misma transacción del cambio:
+    o quedan los dos o ninguno.
+    """
+    if not clave:
+        return
+
+    fila = db.get(RespuestaIdempotente, clave)
+    fila.status_code = status_code
+    fila.cuerpo = jsonable_encoder(cuerpo)
+
+
+# =========================================================
+# PURGA (tarea periódica)
+# =========================================================
+def purgar_vencidas():
+    db = SesionLocal()
+
+    try:
+        vencidas = (
+            db.query(RespuestaIdempotente.clave)
+            .filter(RespuestaIdempotente.expira < func.now())
+            .limit(PURGA_POR_CORRIDA)
+            .scalar_subquery()
+        )
+
+        borradas = db.execute(
+            delete(RespuestaIdempotente)
+            .where(RespuestaIdempotente.clave.in_(vencidas))
+        ).rowcount
+
+        db.commit()
+
+        if borradas:
+            logger.info("🧹 Respuestas idempotentes vencidas borradas", extra={"cantidad": borradas})
+
+        return borradas
+
+    finally:
+        db.close()
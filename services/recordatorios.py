@@ -0,0 +1,110 @@
+import logging
+import os
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import contains_eager, selectinload
+
+from database import SesionLocal
+from models import Turno, Usuario
+from utils.email import encolar_email_recordatorio
+
+logger = logging.getLogger(__name__)
+
+# =========================================================
+# RECORDATORIOS (día antes y hora antes)
+# =========================================================
+# recordatorio_enviado es la marca de agua por turno. Cada etapa
+# busca por rango de (fecha, hora) en el índice parcial de los
+# pendientes y avanza la marca en la misma transacción que encola
+# el email.
+ZONA = ZoneInfo("America/Argentina/Buenos_Aires")
+
+LOTE = int(os.getenv("RECORDATORIOS_LOTE", "200"))
+
+# (marca que deja, anticipación, texto del email, días antes).
+# La hora antes va primero: un turno a menos de una hora
+# recibe solo ese recordatorio.
+# Con `días antes` el email sale solo si el turno es ese día
+# calendario: un turno para hoy mismo queda marcado sin email
+# (no es "de mañana") y recibe el de la hora antes.
+ETAPAS = [
+    (2, timedelta(hours=1), "en una hora", None),
+    (1, timedelta(hours=24), "de mañana", 1),
+]
+
+
+def _procesar_etapa(db, marca: int, anticipacion: timedelta, cuando: str, dias_antes: int | None) -> int:
+    ahora = datetime.now(ZONA).replace(tzinfo=None)
+    limite = ahora + anticipacion
+
+    encolados = 0
+
+    while True:
+        lote = (
+            db.query(Turno)
+            .join(Usuario, Turno.usuario_id == Usuario.id)
+            .options(
+                contains_eager(Turno.usuario),
+                selectinload(Turno.servicio),
+                selectinload(Turno.barbero),
+            )
+            .filter(
+                Turno.recordatorio_enviado < marca,
+                tuple_(Turno.fecha, Turno.hora) > (ahora.date(), ahora.time()),
+                tuple_(Turno.fecha, Turno.hora) <= (limite.date(), limite.time()),
+            )
+            .order_by(Turno.fecha, Turno.hora)
+            .limit(LOTE)
+            # Varios workers: cada uno se lleva filas distintas
+            .with_for_update(of=Turno, skip_locked=True)
+            .all()
+        )
+
+        if not lote:
+            break
+
+        for turno in lote:
+            corresponde = (
+                dias_antes is None
+                or turno.fecha == ahora.date() + timedelta(days=dias_antes)
+            )
+
+            if corresponde and turno.usuario.email:
+                encolar_email_recordatorio(
+                    db,
+                    destino=turno.usuario.email,
+                    nombre=turno.nombre,
+                    fecha=turno.fecha,
+                    hora=turno.hora,
+                    servicio=turno.servicio.nombre,
+                    barbero=turno.barbero.nombre if turno.barbero else "",
+                    cuando=cuando,
+                )
+            turno.recordatorio_enviado = marca
+
+        db.commit()
+        encolados += len(lote)
+
+        if len(lote) < LOTE:
+            break
+
+    return encolados
+
+
+def enviar_recordatorios() -> int:
+    db = SesionLocal()
+
+    try:
+        total = 0
+        for marca, anticipacion, cuando, dias_antes in ETAPAS:
+            total += _procesar_etapa(db, marca, anticipacion, cuando, dias_antes)
+
+        if total:
+            logger.info("⏰ Recordatorios encolados", extra={"cantidad": total})
+
+        return total
+
+    finally:
+        db.close()
@@ -0,0 +1,338 @@
+import logging
+import math
+import os
+from datetime import date, datetime, time, timedelta, timezone
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from database import SesionLocal
+from models import Horario
+from services import agenda_virtual
+from services.disponibilidad import registrar_cambio_horario
+
+logger = logging.getLogger(__name__)
+
+
+# =========================================================
+# DURACIÓN → CANTIDAD DE HORARIOS CONSECUTIVOS
+# =========================================================
+def _minutos(hora: time) -> int:
+    return hora.hour * 60 + hora.minute
+
+
+def intervalo_minutos(horas: list[time]) -> int | None:
+    """
+    Separación entre horarios de un día (la menor diferencia
+    entre dos horas consecutivas de la grilla).
+    """
+    saltos = [
+        _minutos(b) - _minutos(a)
+        for a, b in zip(horas, horas[1:])
+        if b > a
+    ]
+    return min(saltos) if saltos else None
+
+
+def slots_necesarios(servicio, intervalo: int | None) -> int:
+    if servicio is None or not servicio.duracion or not intervalo:
+        return 1
+    return max(1, math.ceil(servicio.duracion / intervalo))
+
+
+# =========================================================
+# BÚSQUEDA DE BLOQUES LIBRES (por barbero y día, en memoria)
+# =========================================================
+def buscar_bloques(filas, servicio) -> list[list]:
+    """
+    `filas` tiene barbero_id, fecha, hora, id y disponible.
+    Devuelve los bloques de horarios libres y consecutivos donde
+    entra el servicio, cada uno como lista de filas.
+
+    Recorre cada barbero-día una sola vez de atrás para adelante,
+    calculando el largo del tramo libre que arranca en cada hora.
+    """
+    por_dia = {}
+    for f in filas:
+        por_dia.setdefault((f.barbero_id, f.fecha), []).append(f)
+
+    bloques = []
+
+    for dia in por_dia.values():
+        dia.sort(key=lambda f: f.hora)
+        intervalo = intervalo_minutos([f.hora for f in dia])
+        k = slots_necesarios(servicio, intervalo)
+
+        largo = [0] * len(dia)
+        for i in range(len(dia) - 1, -1, -1):
+            if not dia[i].disponible:
+                continue
+
+            largo[i] = 1
+            if (
+                i + 1 < len(dia)
+                and _minutos(dia[i + 1].hora) - _minutos(dia[i].hora) == intervalo
+            ):
+                largo[i] += largo[i + 1]
+
+        for i, tramo in enumerate(largo):
+            if tramo >= k:
+                bloques.append(dia[i:i + k])
+
+    bloques.sort(key=lambda b: (b[0].fecha, b[0].hora, b[0].barbero_id))
+    return bloques
+
+
+def filas_del_dia(db: Session, barbero_id: int, fecha: date):
+    if agenda_virtual.ACTIVA:
+        return agenda_virtual.slots(db, [barbero_id], fecha, fecha)
+
+    return (
+        db.query(
+            Horario.barbero_id, Horario.fecha, Horario.hora,
+            Horario.id, Horario.disponible,
+        )
+        .filter(Horario.barbero_id == barbero_id, Horario.fecha == fecha)
+        .order_by(Horario.hora)
+        .all()
+    )
+
+
+def horarios_del_bloque(db: Session, horario: Horario, servicio):
+    """
+    Horarios que ocupa el servicio empezando en `horario`
+    (el primero es `horario`). None si los siguientes no están
+    libres o no son consecutivos.
+    """
+    dia = list(filas_del_dia(db, horario.barbero_id, horario.fecha))
+    horas = [f.hora for f in dia]
+
+    intervalo = intervalo_minutos(horas)
+    k = slots_necesarios(servicio, intervalo)
+
+    if k == 1:
+        return [horario]
+
+    if horario.hora not in horas:
+        return None
+
+    inicio = horas.index(horario.hora)
+    siguientes = dia[inicio + 1:inicio + k]
+
+    if len(siguientes) < k - 1:
+        return None
+
+    anterior = horario.hora
+    bloque = [horario]
+
+    for f in siguientes:
+        if not f.disponible or _minutos(f.hora) - _minutos(anterior) != intervalo:
+            return None
+
+        extra = (
+            db.get(Horario, f.id) if f.id
+            else agenda_virtual.obtener_horario(db, f.barbero_id, f.fecha, f.hora)
+        )
+        if not extra:
+            return None
+
+        bloque.append(extra)
+        anterior = f.hora
+
+    return bloque
+
+
+# =========================================================
+# OCUPAR / LIBERAR
+# =========================================================
+def _reclamable(usuario_id: int | None = None):
+    """
+    Condición SQL de "se puede ocupar": libre, con la retención
+    vencida o retenido por el mismo usuario.
+    """
+    retenido = and_(
+        Horario.hold_hasta != None,
+        or_(
+            Horario.hold_hasta < func.now(),
+            Horario.hold_usuario_id == usuario_id,
+        ),
+    )
+    return or_(Horario.disponible == True, retenido)
+
+
+def libre_para(horario: Horario, usuario_id: int | None = None) -> bool:
+    if horario.disponible:
+        return True
+
+    if horario.hold_hasta is None:
+        return False
+
+    return (
+        horario.hold_usuario_id == usuario_id
+        or horario.hold_hasta < datetime.now(timezone.utc)
+    )
+
+
+def reclamar_horarios(
+    db: Session,
+    horarios: list[Horario],
+    usuario_id: int | None = None,
+) -> bool:
+    """
+    Marca los horarios como ocupados con un único UPDATE condicional.
+    Acepta horarios retenidos por `usuario_id` (o con la retención
+    vencida). Devuelve False si alguno ya no estaba libre: en ese
+    caso el llamador tiene que hacer rollback.
+    """
+    if not horarios:
+        return True
+
+    ids = [h.id for h in horarios]
+
+    tomados = db.execute(
+        update(Horario)
+        .where(Horario.id.in_(ids), _reclamable(usuario_id))
+        .values(disponible=False, hold_hasta=None, hold_usuario_id=None)
+        .returning(Horario.id)
+        .execution_options(synchronize_session="fetch")
+    ).scalars().all()
+
+    if len(tomados) != len(ids):
+        return False
+
+    for h in horarios:
+        registrar_cambio_horario(db, h)
+
+    return True
+
+
+def asignar_extras(turno, bloque: list[Horario]):
+    for h in bloque[1:]:
+        h.turno_extra_id = turno.id
+
+
+def liberar_extras(db: Session, turno):
+    extras = db.query(Horario).filter(Horario.turno_extra_id == turno.id).all()
+
+    for h in extras:
+        h.disponible = True
+        h.turno_extra_id = None
+        registrar_cambio_horario(db, h)
+
+    db.flush()
+
+
+# =========================================================
+# RETENCIONES TEMPORALES (hold mientras se completa la reserva)
+# =========================================================
+HOLD_MINUTOS = int(os.getenv("HOLD_MINUTOS", "3"))
+
+BARRIDO_POR_LOTE = 500
+
+
+def retener_horario(db: Session, horario: Horario, usuario_id: int):
+    """
+    Retiene el horario HOLD_MINUTOS para el usuario y suelta la
+    retención anterior que tuviera (una por usuario).
+    Devuelve el vencimiento o None si el horario no está libre.
+    """
+    hasta = datetime.now(timezone.utc) + timedelta(minutes=HOLD_MINUTOS)
+
+    anteriores = db.execute(
+        update(Horario)
+        .where(
+            Horario.hold_usuario_id == usuario_id,
+            Horario.id != horario.id,
+        )
+        .values(disponible=True, hold_hasta=None, hold_usuario_id=None)
+        .returning(Horario.id)
+        .execution_options(synchronize_session="fetch")
+    ).scalars().all()
+
+    tomado = db.execute(
+        update(Horario)
+        .where(Horario.id == horario.id, _reclamable(usuario_id))
+        .values(disponible=False, hold_hasta=hasta, hold_usuario_id=usuario_id)
+        .returning(Horario.id)
+        .execution_options(synchronize_session="fetch")
+    ).scalar()
+
+    if tomado is None:
+        return None
+
+    for h in db.query(Horario).filter(Horario.id.in_(anteriores)):
+        registrar_cambio_horario(db, h)
+
+    registrar_cambio_horario(db, horario)
+    return hasta
+
+
+def soltar_retencion(db: Session, horario_id: int, usuario_id: int) -> bool:
+    soltado = db.execute(
+        update(Horario)
+        .where(
+            Horario.id == horario_id,
+            Horario.hold_usuario_id == usuario_id,
+        )
+        .values(disponible=True, hold_hasta=None, hold_usuario_id=None)
+        .returning(Horario.id)
+        .execution_options(synchronize_session="fetch")
+    ).scalar()
+
+    if soltado is None:
+        return False
+
+    registrar_cambio_horario(db, db.get(Horario, horario_id))
+    return True
+
+
+def barrer_retenciones() -> int:
+    """
+    Libera las retenciones vencidas en lotes, usando el índice
+    parcial de hold_hasta. SKIP LOCKED deja que varios workers
+    barran a la vez sin pisarse ni esperar reservas en curso.
+    """
+    liberados = 0
+    db = SesionLocal()
+
+    try:
+        while True:
+            vencidos = (
+                select(Horario.id)
+                .where(
+                    Horario.hold_hasta != None,
+                    Horario.hold_hasta < func.now(),
+                )
+                .order_by(Horario.hold_hasta)
+                .limit(BARRIDO_POR_LOTE)
+                .with_for_update(skip_locked=True)
+                .scalar_subquery()
+            )
+
+            filas = db.execute(
+                update(Horario)
+                .where(Horario.id.in_(vencidos))
+                .values(disponible=True, hold_hasta=None, hold_usuario_id=None)
+                .returning(
+                    Horario.id, Horario.barbero_id, Horario.fecha,
+                    Horario.hora, Horario.disponible,
+                )
+                .execution_options(synchronize_session=False)
+            ).all()
+
+            for fila in filas:
+                registrar_cambio_horario(db, fila)
+
+            db.commit()
+            liberados += len(filas)
+
+            if len(filas) < BARRIDO_POR_LOTE:
+                break
+
+        if liberados:
+            logger.info("⏳ Retenciones vencidas liberadas", extra={"cantidad": liberados})
+
+        return liberados
+
+    finally:
+        db.close()
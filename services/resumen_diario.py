@@ -0,0 +1,267 @@
+import logging
+from collections import defaultdict
+
+from sqlalchemy import delete, event, func, inspect, literal_column, select, text, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session, aliased
+
+from database import SesionLocal
+from models import ResumenDiario, RolEnum, Turno, Usuario
+from services.ganancias import PORCENTAJE_ADMIN, PORCENTAJE_BARBERO, reparto, repartir
+
+logger = logging.getLogger(__name__)
+
+# =========================================================
+# RESUMEN DIARIO (fecha, barbero, servicio)
+# =========================================================
+# Cada flush que agrega, borra o cambia turnos suma / resta su
+# parte en resumen_diario dentro de la misma transacción: reservar,
+# registro manual, editar y cancelar quedan cubiertos sin tocar
+# los handlers. Los paneles leen unas pocas filas agregadas.
+#
+# Si alguna vez se desfasa (cambios por SQL a mano):
+#   python scripts/reconstruir_resumen.py
+
+_CAMPOS_TURNO = ("fecha", "barbero_id", "servicio_id", "precio")
+
+
+def _valores_anteriores(turno: Turno) -> tuple:
+    estado = inspect(turno)
+    valores = []
+
+    for campo in _CAMPOS_TURNO:
+        historia = estado.attrs[campo].load_history()
+        if historia.deleted:
+            valores.append(historia.deleted[0])
+        elif historia.unchanged:
+            valores.append(historia.unchanged[0])
+        else:
+            valores.append(None)
+
+    return tuple(valores)
+
+
+def _valores_actuales(turno: Turno) -> tuple:
+    return tuple(getattr(turno, campo) for campo in _CAMPOS_TURNO)
+
+
+def _cambios_de_turnos(db: Session) -> list[tuple]:
+    """
+    [(fecha, barbero_id, servicio_id, precio, signo), ...]
+    """
+    cambios = []
+
+    for obj in db.new:
+        if isinstance(obj, Turno):
+            cambios.append((*_valores_actuales(obj), 1))
+
+    for obj in db.deleted:
+        if isinstance(obj, Turno):
+            cambios.append((*_valores_anteriores(obj), -1))
+
+    for obj in db.dirty:
+        if not isinstance(obj, Turno) or not db.is_modified(obj):
+            continue
+
+        anteriores = _valores_anteriores(obj)
+        actuales = _valores_actuales(obj)
+
+        if anteriores != actuales:
+            cambios.append((*anteriores, -1))
+            cambios.append((*actuales, 1))
+
+    # Turnos viejos sin fecha no entran en el resumen
+    return [c for c in cambios if c[0] is not None and c[3] is not None]
+
+
+def _admins(conexion, barbero_ids: set) -> set:
+    ids = {b for b in barbero_ids if b is not None}
+    if not ids:
+        return set()
+
+    filas = conexion.execute(
+        select(Usuario.id).where(Usuario.id.in_(ids), Usuario.rol == RolEnum.admin)
+    )
+    return {fila.id for fila in filas}
+
+
+def aplicar_cambios(conexion, cambios: list[tuple]):
+    admins = _admins(conexion, {c[1] for c in cambios})
+
+    deltas = defaultdict(lambda: [0, 0.0, 0.0, 0.0, 0.0])
+
+    for fecha, barbero_id, servicio_id, precio, signo in cambios:
+        delta = deltas[(fecha, barbero_id, servicio_id)]
+        propia, alquiler, barbero = repartir(precio, barbero_id in admins)
+
+        delta[0] += signo
+        delta[1] += signo * precio
+        delta[2] += signo * propia
+        delta[3] += signo * alquiler
+        delta[4] += signo * barbero
+
+    # Orden fijo: dos transacciones no se bloquean en cruz
+    for (fecha, barbero_id, servicio_id), d in sorted(
+        deltas.items(), key=lambda item: (item[0][0], item[0][1] or 0, item[0][2])
+    ):
+        if not any(d):
+            continue
+
+        stmt = insert(ResumenDiario).values(
+            fecha=fecha,
+            barbero_id=barbero_id,
+            servicio_id=servicio_id,
+            cantidad=d[0],
+            facturacion=d[1],
+            admin_propia=d[2],
+            admin_alquiler=d[3],
+            parte_barbero=d[4],
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[
+                ResumenDiario.fecha,
+                func.coalesce(ResumenDiario.barbero_id, literal_column("0")),
+                ResumenDiario.servicio_id,
+            ],
+            set_={
+                "cantidad": ResumenDiario.cantidad + stmt.excluded.cantidad,
+                "facturacion": ResumenDiario.facturacion + stmt.excluded.facturacion,
+                "admin_propia": ResumenDiario.admin_propia + stmt.excluded.admin_propia,
+                "admin_alquiler": ResumenDiario.admin_alquiler + stmt.excluded.admin_alquiler,
+                "parte_barbero": ResumenDiario.parte_barbero + stmt.excluded.parte_barbero,
+            },
+        )
+        conexion.execute(stmt)
+
+
+def recalcular_reparto(conexion, barbero_id: int, es_admin: bool):
+    """
+    El reparto depende del rol del barbero: si cambia, se rehace
+    sobre la facturación ya sumada.
+    """
+    if es_admin:
+        valores = {
+            "admin_propia": ResumenDiario.facturacion,
+            "admin_alquiler": 0,
+            "parte_barbero": 0,
+        }
+    else:
+        valores = {
+            "admin_propia": 0,
+            "admin_alquiler": ResumenDiario.facturacion * PORCENTAJE_ADMIN,
+            "parte_barbero": ResumenDiario.facturacion * PORCENTAJE_BARBERO,
+        }
+
+    conexion.execute(
+        update(ResumenDiario)
+        .where(ResumenDiario.barbero_id == barbero_id)
+        .values(**valores)
+    )
+
+
+def _cambios_de_rol(db: Session) -> list[tuple[int, bool]]:
+    cambios = []
+
+    for obj in db.dirty:
+        if isinstance(obj, Usuario) and inspect(obj).attrs.rol.history.has_changes():
+            cambios.append((obj.id, obj.rol == RolEnum.admin))
+
+    return cambios
+
+
+@event.listens_for(SesionLocal, "before_flush")
+def _cargar_borrados(db: Session, flush_context, instances):
+    # Después del flush la fila ya no existe: los valores de los
+    # turnos borrados se cargan ahora
+    for obj in db.deleted:
+        if isinstance(obj, Turno):
+            for campo in _CAMPOS_TURNO:
+                getattr(obj, campo)
+
+
+@event.listens_for(SesionLocal, "after_flush")
+def _actualizar_resumen(db: Session, flush_context):
+    # En after_flush las FK ya están sincronizadas con las relaciones
+    # (turno.servicio = ... actualiza servicio_id recién acá) y la
+    # historia de cada atributo sigue intacta
+    cambios = _cambios_de_turnos(db)
+    roles = _cambios_de_rol(db)
+
+    if not cambios and not roles:
+        return
+
+    conexion = db.connection()
+
+    if cambios:
+        aplicar_cambios(conexion, cambios)
+
+    # El reparto de todas las filas del barbero (también las que se
+    # acaban de sumar) se rehace con el rol nuevo
+    for barbero_id, es_admin in roles:
+        recalcular_reparto(conexion, barbero_id, es_admin)
+
+
+# =========================================================
+# RECONSTRUIR DESDE CERO
+# =========================================================
+def reconstruir(db: Session) -> int:
+    """
+    Borra y vuelve a sumar todo desde turnos. Bloquea la tabla
+    mientras tanto: las reservas que llegan esperan y se suman
+    después, sobre el resumen nuevo.
+    """
+    db.execute(text("LOCK TABLE resumen_diario IN EXCLUSIVE MODE"))
+    db.execute(delete(ResumenDiario))
+
+    Barbero = aliased(Usuario)
+    admin_propia, admin_alquiler, parte_barbero = reparto(Barbero.rol, Turno.precio)
+
+    origen = (
+        select(
+            Turno.fecha,
+            Turno.barbero_id,
+            Turno.servicio_id,
+            func.count(Turno.id),
+            func.sum(Turno.precio),
+            func.sum(admin_propia),
+            func.sum(admin_alquiler),
+            func.sum(parte_barbero),
+        )
+        .outerjoin(Barbero, Turno.barbero_id == Barbero.id)
+        .where(Turno.fecha.isnot(None))
+        .group_by(Turno.fecha, Turno.barbero_id, Turno.servicio_id)
+    )
+
+    filas = db.execute(
+        insert(ResumenDiario).from_select(
+            [
+                "fecha", "barbero_id", "servicio_id", "cantidad", "facturacion",
+                "admin_propia", "admin_alquiler", "parte_barbero",
+            ],
+            origen,
+        )
+    ).rowcount
+
+    logger.info("📊 Resumen diario reconstruido", extra={"filas": filas})
+    return filas
+
+
+def reconstruir_si_vacio():
+    """
+    Al arrancar: la primera vez que existe la tabla, se llena con
+    los turnos que ya había.
+    """
+    db = SesionLocal()
+
+    try:
+        if db.query(ResumenDiario.id).limit(1).first():
+            return
+
+        if not db.query(Turno.id).filter(Turno.fecha.isnot(None)).limit(1).first():
+            return
+
+        reconstruir(db)
+        db.commit()
+
+    finally:
+        db.close()
@@ -0,0 +1,32 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# =========================================================
+# TAREAS PERIÓDICAS EN SEGUNDO PLANO (un hilo por tarea y worker)
+# =========================================================
+_detener = threading.Event()
+
+
+def iniciar_tarea_periodica(nombre: str, intervalo_segundos: float, funcion):
+    """
+    Corre `funcion` apenas arranca y después cada `intervalo_segundos`.
+    Los errores se loguean y la tarea sigue en la próxima vuelta.
+    Si varias instancias no deben correr a la vez, la función
+    tiene que coordinarse sola (advisory lock, SKIP LOCKED...).
+    """
+    def ciclo():
+        while not _detener.is_set():
+            try:
+                funcion()
+            except Exception as e:
+                logger.exception("❌ Error en tarea %s: %s", nombre, e)
+
+            _detener.wait(intervalo_segundos)
+
+    threading.Thread(target=ciclo, name=nombre, daemon=True).start()
+
+
+def detener_tareas():
+    _detener.set()
@@ -1,71 +1,23 @@
-import os
-import resend
+from services.correo import encolar
 
 
 # =========================================================
-# FUNCION BASE (segura, nunca rompe el servidor)
+# FUNCION BASE (encola en el outbox, nunca rompe el servidor)
 # =========================================================
-# def enviar_email(destino, asunto, texto, html=None):
-
-#     api_key = os.getenv("RESEND_API_KEY")
-
-#     if not api_key:
-#         print("⚠️ Email desactivado: RESEND_API_KEY no configurada")
-#         return  # no rompe la app
-
-#     try:
-#         resend.api_key = api_key
-
-#         contenido_html = html if html else f"<pre>{texto}</pre>"
-
-#         resend.Emails.send({
-#             "from": "Barberia <onboarding@resend.dev>",
-#             "to": [destino],
-#             "subject": asunto,
-#             "html": contenido_html
-#         })
-
-#         print("✅ Email enviado correctamente")
-
-#     except Exception as e:
-#         # Nunca dejar que el email rompa la request principal
-#         print("❌ Error enviando email:", str(e))
-def enviar_email(destino, asunto, texto, html=None):
-
-    api_key = os.getenv("RESEND_API_KEY")
-
-    if not api_key:
-        print("⚠️ Email desactivado: RESEND_API_KEY no configurada")
-        return  # 👈 NO romper la app
-
-    resend.api_key = api_key
-
-    real_destino = destino
-    # EMAIL_TEST = os.getenv("EMAIL_TEST")
-
-    # if EMAIL_TEST and EMAIL_TEST != "false":
-    #     destino = EMAIL_TEST
-    #     print(f"[TEST MODE] {real_destino} -> {destino}")
-
+def encolar_email(db, destino, asunto, texto, html=None):
+    """
+    Deja el email en el outbox (misma transacción que el cambio).
+    Lo manda services.correo.despachar_pendientes en segundo plano.
+    """
     contenido_html = html if html else f"<pre>{texto}</pre>"
+    encolar(db, destino, asunto, contenido_html)
 
-    try:
-        resend.Emails.send({
-            "from": "Turnos <no-reply@farixio.com>",
-            "to": [destino],
-            "reply_to": real_destino,
-            "subject": asunto,
-            "html": contenido_html
-        })
-
-        print("✅ Email enviado")
 
-    except Exception as e:
-        print("❌ Error enviando email:", e)
 # =========================================================
 # CONFIRMACION
 # =========================================================
-def enviar_email_confirmacion(
+def encolar_email_confirmacion(
+    db,
     destino,
     nombre,
     fecha,
@@ -105,11 +57,11 @@ Te esperamos 💈
 <p>💈 Barbería</p>
 """
 
-    enviar_email(destino, "✅ Confirmación de tu turno", texto, html)
+    encolar_email(db, destino, "✅ Confirmación de tu turno", texto, html)
 # =========================================================
 # CANCELACION
 # =========================================================
-def enviar_email_cancelacion(destino, nombre, fecha, hora, servicio):
+def encolar_email_cancelacion(db, destino, nombre, fecha, hora, servicio):
 
     texto = f"""
 Hola {nombre},
@@ -126,13 +78,14 @@ Saludos,
 Barbería 💈
 """
 
-    enviar_email(destino, "❌ Turno cancelado – Barbería", texto)
+    encolar_email(db, destino, "❌ Turno cancelado – Barbería", texto)
 
 
 # =========================================================
 # EDICION
 # =========================================================
-def enviar_email_edicion(
+def encolar_email_edicion(
+    db,
     destino,
     nombre,
     fecha_anterior,
@@ -162,4 +115,36 @@ Saludos,
 Barbería 💈
 """
 
-    enviar_email(destino, "✏️ Tu turno fue modificado", texto)
+    encolar_email(db, destino, "✏️ Tu turno fue modificado", texto)
+
+
+# =========================================================
+# RECORDATORIO
+# =========================================================
+def encolar_email_recordatorio(
+    db,
+    destino,
+    nombre,
+    fecha,
+    hora,
+    servicio,
+    barbero,
+    cuando
+):
+
+    texto = f"""
+Hola {nombre},
+
+Te recordamos tu turno {cuando} ⏰
+
+📅 Día: {fecha.strftime('%d/%m/%Y')}
+⏰ Horario: {hora.strftime('%H:%M')}
+✂️ Servicio: {servicio}
+💈 Barbero: {barbero}
+
+Si no podés venir, cancelalo desde la web así otro cliente aprovecha el horario.
+
+Te esperamos 💈
+"""
+
+    encolar_email(db, destino, f"⏰ Recordatorio: tu turno {cuando}", texto)
@@ -1,6 +1,7 @@
 from datetime import date, timedelta
 from sqlalchemy.orm import Session
 from models import Usuario, Horario, HorarioBase, RolEnum
+from services.disponibilidad import registrar_cambio_agenda
 
 INTERVALO = 30  # minutos
 
@@ -20,7 +21,13 @@ def dia_espanol(fecha: date):
 def generar_horarios_barbero(db: Session, barbero: Usuario, dias_a_generar: int = 365):
     """
     Genera horarios disponibles para un barbero usando HorarioBase.
+    Con agenda virtual no hace falta: no se genera nada.
     """
+    from services import agenda_virtual
+
+    if agenda_virtual.ACTIVA:
+        return
+
     hoy = date.today()
     for i in range(dias_a_generar):
         fecha = hoy + timedelta(days=i)
@@ -39,4 +46,6 @@ def generar_horarios_barbero(db: Session, barbero: Usuario, dias_a_generar: int
                     disponible=True,
                     barbero_id=barbero.id
                 ))
+
+    registrar_cambio_agenda(db, barbero.id)
     db.commit()
\ No newline at end of file
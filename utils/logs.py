@@ -0,0 +1,135 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+
+# =========================================================
+# LOGS (JSON, sin bloquear el request)
+# =========================================================
+# Los endpoints solo encolan el registro (QueueHandler); un hilo
+# aparte lo formatea y lo escribe en stdout.
+#
+#   LOG_NIVEL=INFO
+#   LOG_FORMATO=json | texto
+#   LOG_NIVELES=auth=WARNING,services.correo=DEBUG
+#   LOG_MUESTREO=auth=0.01            (DEBUG/INFO que se conservan)
+#
+# Para un evento puntual muy frecuente:
+#   logger.debug("...", extra={"muestreo": 0.01})
+
+_ATRIBUTOS_ESTANDAR = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "muestreo"}
+
+_listener = None
+
+
+def _parsear_mapa(valor: str) -> dict[str, str]:
+    mapa = {}
+    for parte in valor.split(","):
+        if "=" in parte:
+            nombre, dato = parte.split("=", 1)
+            mapa[nombre.strip()] = dato.strip()
+    return mapa
+
+
+class FormatoJSON(logging.Formatter):
+
+    def format(self, record: logging.LogRecord) -> str:
+        datos = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "mensaje": record.getMessage(),
+        }
+
+        for clave, valor in vars(record).items():
+            if clave not in _ATRIBUTOS_ESTANDAR:
+                datos[clave] = valor
+
+        if record.exc_info:
+            datos["error"] = self.formatException(record.exc_info)
+
+        return json.dumps(datos, ensure_ascii=False, default=str)
+
+
+class FiltroMuestreo(logging.Filter):
+    """
+    Deja pasar solo una fracción de los DEBUG/INFO, según el
+    `muestreo` del registro o la tasa configurada para su logger.
+    WARNING o más siempre pasan.
+    """
+
+    def __init__(self, tasas: dict[str, float]):
+        super().__init__()
+        self.tasas = tasas
+
+    def _tasa(self, record: logging.LogRecord) -> float:
+        tasa = getattr(record, "muestreo", None)
+        if tasa is not None:
+            return tasa
+
+        nombre = record.name
+        while nombre:
+            if nombre in self.tasas:
+                return self.tasas[nombre]
+            nombre = nombre.rpartition(".")[0]
+
+        return 1.0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+
+        tasa = self._tasa(record)
+        return tasa >= 1.0 or random.random() < tasa
+
+
+def configurar_logs():
+    """
+    Llamar una vez al arrancar, antes de importar el resto de la app.
+    """
+    global _listener
+
+    if _listener is not None:
+        return
+
+    salida = logging.StreamHandler(sys.stdout)
+    if os.getenv("LOG_FORMATO", "json") == "json":
+        salida.setFormatter(FormatoJSON())
+    else:
+        salida.setFormatter(logging.Formatter(
+            "%(asctime)s %(levelname)s %(name)s: %(message)s"
+        ))
+
+    cola = queue.SimpleQueue()
+    encolador = logging.handlers.QueueHandler(cola)
+    encolador.addFilter(FiltroMuestreo({
+        nombre: float(tasa)
+        for nombre, tasa in _parsear_mapa(os.getenv("LOG_MUESTREO", "")).items()
+    }))
+
+    raiz = logging.getLogger()
+    raiz.handlers = [encolador]
+    raiz.setLevel(os.getenv("LOG_NIVEL", "INFO").upper())
+
+    for nombre, nivel in _parsear_mapa(os.getenv("LOG_NIVELES", "")).items():
+        logging.getLogger(nombre).setLevel(nivel.upper())
+
+    _listener = logging.handlers.QueueListener(cola, salida, respect_handler_level=True)
+    _listener.start()
+    atexit.register(detener_logs)
+
+
+def detener_logs():
+    """
+    Vacía la cola antes de salir.
+    """
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,96 @@
+import base64
+from datetime import date, time
+
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+
+
+# =========================================================
+# CURSOR OPACO (fecha, hora, id)
+# =========================================================
+def codificar_cursor(fecha: date, hora: time, id: int) -> str:
+    crudo = f"{fecha.isoformat()}|{hora.isoformat()}|{id}"
+    return base64.urlsafe_b64encode(crudo.encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str):
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        crudo = base64.urlsafe_b64decode(cursor + relleno).decode()
+        fecha, hora, id = crudo.split("|")
+        return date.fromisoformat(fecha), time.fromisoformat(hora), int(id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+
+def despues_de(cursor: str, fecha_col, hora_col, id_col):
+    """
+    Condición keyset: filas estrictamente posteriores al cursor
+    en el orden (fecha, hora, id).
+    """
+    return tuple_(fecha_col, hora_col, id_col) > tuple_(*decodificar_cursor(cursor))
+
+
+def paginar(query, limite: int | None, fecha_col, hora_col, id_col):
+    """
+    Ejecuta la query ya ordenada por (fecha, hora, id).
+
+    Devuelve (filas, siguiente_cursor). Si no hay límite se devuelve
+    todo y el cursor es None.
+    """
+    if not limite:
+        return query.all(), None
+
+    filas = query.limit(limite + 1).all()
+
+    if len(filas) <= limite:
+        return filas, None
+
+    filas = filas[:limite]
+    ultima = filas[-1]
+
+    return filas, codificar_cursor(
+        getattr(ultima, fecha_col.key),
+        getattr(ultima, hora_col.key),
+        getattr(ultima, id_col.key),
+    )
+
+
+def siguiente_cursor(query, limite: int | None, fecha_col, hora_col, id_col):
+    """
+    Cursor de la página siguiente sin traer las filas: solo lee las
+    claves de las posiciones `limite` y `limite + 1` (para respuestas
+    en streaming, donde el header sale antes que el cuerpo).
+    """
+    if not limite:
+        return None
+
+    claves = (
+        query.with_entities(fecha_col, hora_col, id_col)
+        .offset(limite - 1)
+        .limit(2)
+        .all()
+    )
+
+    if len(claves) < 2:
+        return None
+
+    return codificar_cursor(*claves[0])
+
+
+def paginar_lista(filas, cursor: str | None, limite: int | None):
+    """
+    Igual que paginar() pero sobre filas ya calculadas en memoria
+    (agenda virtual). Las filas sin id usan 0 en el cursor.
+    """
+    if cursor:
+        clave = decodificar_cursor(cursor)
+        filas = [f for f in filas if (f.fecha, f.hora, f.id or 0) > clave]
+
+    if not limite or len(filas) <= limite:
+        return filas, None
+
+    filas = filas[:limite]
+    ultima = filas[-1]
+
+    return filas, codificar_cursor(ultima.fecha, ultima.hora, ultima.id or 0)
@@ -0,0 +1,101 @@
+import csv
+import io
+import json
+
+from database import SesionLocal
+
+# =========================================================
+# RESPUESTAS EN STREAMING DESDE UN CURSOR DEL SERVIDOR
+# =========================================================
+# yield_per hace que psycopg2 use un cursor con nombre: Postgres
+# manda las filas de a TANDA y la memoria no crece con el rango.
+TANDA = 500
+
+
+def sesion_de_lectura():
+    """
+    Sesión con una sola foto de la base (REPEATABLE READ): todo lo
+    que se lee con ella (p. ej. el cursor del header y las filas del
+    cuerpo) es consistente aunque lleguen cambios en el medio.
+    Pasarla a *_en_tandas(db=...), que la cierra al terminar.
+    """
+    db = SesionLocal()
+    db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+    return db
+
+
+def filas_en_tandas(stmt, tanda: int = TANDA, db=None):
+    """
+    Itera las tandas de filas de `stmt`. Sin `db` abre su propia
+    sesión (la del request ya puede estar cerrada cuando se envía
+    el cuerpo). La sesión se cierra al terminar.
+    """
+    db = db or SesionLocal()
+
+    try:
+        resultado = db.execute(stmt.execution_options(yield_per=tanda))
+        for filas in resultado.partitions():
+            yield filas
+
+    finally:
+        db.close()
+
+
+def json_en_tandas(stmt, serializar, tanda: int = TANDA, db=None):
+    """
+    Lista JSON armada y enviada de a una tanda por vez.
+    """
+    yield "["
+
+    primera = True
+    for filas in filas_en_tandas(stmt, tanda, db):
+        trozo = ",".join(json.dumps(serializar(f), ensure_ascii=False) for f in filas)
+
+        if not primera:
+            trozo = "," + trozo
+        primera = False
+
+        yield trozo
+
+    yield "]"
+
+
+def ndjson_en_tandas(stmt, serializar, tanda: int = TANDA):
+    """
+    Un objeto JSON por línea, una tanda por trozo.
+    """
+    for filas in filas_en_tandas(stmt, tanda):
+        yield "".join(json.dumps(serializar(f), ensure_ascii=False) + "\n" for f in filas)
+
+
+# Una celda de texto que empieza así la planilla la toma como
+# fórmula (CSV injection): se le antepone una comilla
+PREFIJOS_FORMULA = ("=", "+", "-", "@", "\t", "\r")
+
+
+def celda_segura(valor):
+    if isinstance(valor, str) and valor.startswith(PREFIJOS_FORMULA):
+        return "'" + valor
+    return valor
+
+
+def csv_en_tandas(stmt, columnas: list[str], serializar, tanda: int = TANDA):
+    """
+    CSV con encabezado; `serializar` devuelve un dict con `columnas`.
+    Los textos se escapan con celda_segura().
+    """
+    buffer = io.StringIO()
+    escritor = csv.DictWriter(buffer, fieldnames=columnas)
+
+    escritor.writeheader()
+    yield buffer.getvalue()
+
+    for filas in filas_en_tandas(stmt, tanda):
+        buffer.seek(0)
+        buffer.truncate()
+
+        escritor.writerows(
+            {clave: celda_segura(valor) for clave, valor in serializar(f).items()}
+            for f in filas
+        )
+        yield buffer.getvalue()